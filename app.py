@@ -1,59 +1,147 @@
 
+import logging
 import os
+import time
+
+# Startup is measured from here: import of this module to its first served request
+_IMPORT_STARTED = time.perf_counter()
+
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
 
 # Import new dashboard layout function instead of app
 from mian_dashboard_working import app as milestone_app, milestone_dashboard_layout
-from risk_dashboard_working import risk_dashboard
+from risk_dashboard_working import risk_dashboard, register_risk_callbacks
 from issue_dashboard import issue_dashboard, register_issue_callbacks
+from portfolio_dashboard import portfolio_dashboard, project_href, register_portfolio_callbacks
+import history_store
+import live_updates
+import metrics
+import workbook_data
 
 server = milestone_app.server  # Use the app's server
 
-# Home layout
-home_layout = dbc.Container([
-    html.H1("Welcome to AIS Portal", className="text-center my-4"),
-    dbc.Row([
-        dbc.Col(
-            dcc.Link(dbc.Button("📊 Dashboard", color="primary", className="btn-lg w-100"), href="/dashboard"),
-            width=4
-        ),
-        dbc.Col(
-            dcc.Link(dbc.Button("🛡️ Risk View", color="danger", className="btn-lg w-100"), href="/risks"),
-            width=4
-        ),
-        dbc.Col(
-            dcc.Link(dbc.Button("🐞 Issue Tracker", color="warning", className="btn-lg w-100"), href="/issues"),
-            width=4
-        ),
-    ], justify="center", className="my-4"),
-    html.P("Select an option above to navigate between views.", className="text-center text-muted")
-], fluid=True)
-
-# Set up layout for routing
+logger = logging.getLogger(__name__)
+
+# Import-to-first-request budget; exceeding it is logged as a warning
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 5))
+STARTUP_TIMINGS = {"import_seconds": None, "first_request_seconds": None}
+
+# Keep the workbook snapshot warm in the background so pages never wait on Sheets
+@server.before_request
+def start_background_refresh():
+    if STARTUP_TIMINGS["first_request_seconds"] is None:
+        elapsed = time.perf_counter() - _IMPORT_STARTED
+        STARTUP_TIMINGS["first_request_seconds"] = elapsed
+        log = logger.warning if elapsed > STARTUP_BUDGET_SECONDS else logger.info
+        log("Startup: first request %.2fs after import (budget %.1fs)", elapsed, STARTUP_BUDGET_SECONDS)
+    workbook_data.start_refresher()
+
+# Home layout for one project
+def home_layout(project):
+    multi_project = len(workbook_data.PROJECTS) > 1
+    return dbc.Container([
+        html.H1("Welcome to AIS Portal", className="text-center my-4"),
+        html.H4(f"Project: {project}", className="text-center text-muted") if multi_project else None,
+        dbc.Row([
+            dbc.Col(
+                dcc.Link(dbc.Button("📊 Dashboard", color="primary", className="btn-lg w-100"),
+                         href=project_href(project, "dashboard")),
+                width=4
+            ),
+            dbc.Col(
+                dcc.Link(dbc.Button("🛡️ Risk View", color="danger", className="btn-lg w-100"),
+                         href=project_href(project, "risks")),
+                width=4
+            ),
+            dbc.Col(
+                dcc.Link(dbc.Button("🐞 Issue Tracker", color="warning", className="btn-lg w-100"),
+                         href=project_href(project, "issues")),
+                width=4
+            ),
+        ], justify="center", className="my-4"),
+        html.P(dcc.Link("All projects", href="/portfolio"), className="text-center") if multi_project else None,
+        html.P("Select an option above to navigate between views.", className="text-center text-muted")
+    ], fluid=True)
+
+# Set up layout for routing. 'project' is set from the URL; 'live-versions'
+# is set by assets/live_updates.js and 'live-version' picks the current
+# project's entry from it. All three outlive page changes.
 milestone_app.layout = html.Div([
     dcc.Location(id="url", refresh=False),
+    dcc.Store(id="project"),
+    dcc.Store(id="live-versions"),
+    dcc.Store(id="live-version"),
     html.Div(id="page-content")
 ])
 
+def parse_path(pathname):
+    # "/<project>/<page>", or "/<page>" for the default project
+    parts = [part for part in (pathname or "/").split("/") if part]
+    project = workbook_data.DEFAULT_PROJECT
+    if parts and parts[0] in workbook_data.PROJECTS:
+        project = parts.pop(0)
+    return project, (parts[0] if parts else "")
+
 # Routing callback
 @milestone_app.callback(
     Output("page-content", "children"),
+    Output("project", "data"),
     Input("url", "pathname")
 )
+@metrics.instrument_callback("display_page")
 def display_page(pathname):
-    if pathname == "/dashboard":
-        return milestone_dashboard_layout()
-    elif pathname == "/risks":
-        return risk_dashboard()
-    elif pathname == "/issues":
-        return issue_dashboard()
+    project, page = parse_path(pathname)
+    if page == "dashboard":
+        return milestone_dashboard_layout(), project
+    elif page == "risks":
+        return risk_dashboard(project), project
+    elif page == "issues":
+        return issue_dashboard(), project
+    elif page == "portfolio":
+        return portfolio_dashboard(), project
     else:
-        return home_layout
+        return home_layout(project), project
 
-# Register issue tracker callbacks
+# Only a new version of the project on screen triggers the page callbacks
+milestone_app.clientside_callback(
+    """
+    function(versions, project, current) {
+        const version = versions && versions[project];
+        if (version === undefined || version === current) {
+            return window.dash_clientside.no_update;
+        }
+        return version;
+    }
+    """,
+    Output("live-version", "data"),
+    Input("live-versions", "data"),
+    Input("project", "data"),
+    State("live-version", "data")
+)
+
+# Register issue tracker, risk table and portfolio callbacks
 register_issue_callbacks(milestone_app)
+register_risk_callbacks(milestone_app)
+register_portfolio_callbacks(milestone_app)
+
+# Server-sent events announcing new workbook versions
+live_updates.register_live_updates(server)
+
+# Record changed rows for the burndown and risk trend charts
+if history_store.RECORD_IN_PROCESS:
+    history_store.start_recording()
+
+# Prometheus-style /metrics route and request timing
+metrics.register_metrics(server)
+metrics.gauge("startup_import_seconds", lambda: STARTUP_TIMINGS["import_seconds"])
+metrics.gauge("startup_first_request_seconds", lambda: STARTUP_TIMINGS["first_request_seconds"])
+metrics.gauge("workbook_snapshot_age_seconds", workbook_data.snapshot_age)
+metrics.gauge("workbook_cache_bytes", lambda: workbook_data.registry.nbytes())
+metrics.gauge("workbook_cached_projects", lambda: len(workbook_data.registry.cached_projects()))
+
+STARTUP_TIMINGS["import_seconds"] = time.perf_counter() - _IMPORT_STARTED
 
 # Run app
 if __name__ == "__main__":
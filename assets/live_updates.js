@@ -0,0 +1,35 @@
+// Follows the server's /events stream and keeps the latest workbook version
+// of each project in the 'live-versions' store; a clientside callback passes
+// the current project's version on to the page callbacks. If the stream is
+// refused, the pages' slow interval still refreshes them and the stream is
+// retried later.
+(function () {
+    var RETRY_AFTER_REFUSAL_MS = 60000;
+    var versions = {};
+
+    function push() {
+        var clientside = window.dash_clientside;
+        if (clientside && clientside.set_props) {
+            clientside.set_props('live-versions', {data: Object.assign({}, versions)});
+        }
+    }
+
+    function connect() {
+        var source = new EventSource('/events');
+        source.addEventListener('version', function (event) {
+            var update = JSON.parse(event.data);
+            versions[update.project] = update.version;
+            push();
+        });
+        source.onerror = function () {
+            // The browser reconnects by itself unless the server refused the stream
+            if (source.readyState === EventSource.CLOSED) {
+                setTimeout(connect, RETRY_AFTER_REFUSAL_MS);
+            }
+        };
+    }
+
+    if (window.EventSource) {
+        connect();
+    }
+})();
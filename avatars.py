@@ -0,0 +1,113 @@
+# Member photo thumbnails.
+# On the first avatar_url() call each registered photo is shrunk to
+# AVATAR_SIZE px (twice the 45px it is shown at, for high-density screens),
+# recompressed, and written under a name carrying a hash of the source and
+# settings, so importing the app reads and writes no files. A new
+# photo gets a new URL, so /avatars/ responses can be cached by browsers
+# forever. Pillow is optional: without it the originals are served under
+# hashed names, which still keeps repeat visits free.
+#
+#   python avatars.py   # build ahead of time, e.g. in a container image
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+from flask import send_from_directory
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+AVATAR_DIR = os.environ.get("AVATAR_CACHE_DIR", ".avatar_cache")
+AVATAR_SIZE = int(os.environ.get("AVATAR_SIZE", 90))
+AVATAR_QUALITY = int(os.environ.get("AVATAR_QUALITY", 80))
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+logger = logging.getLogger(__name__)
+
+_urls = {}  # source file name -> /avatars/ URL
+_pending = []  # registered file names not built yet
+_lock = threading.Lock()
+
+
+def _pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _thumbnail_name(source, data):
+    # Whether Pillow resized it is part of the name, so installing it later changes the URL
+    digest = hashlib.sha1(data)
+    settings = f"{AVATAR_SIZE}:{AVATAR_QUALITY}" if _pillow() else "original"
+    digest.update(settings.encode())
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f"{stem}.{digest.hexdigest()[:12]}.jpg"
+
+
+def _write_thumbnail(source, target):
+    Image = _pillow()
+    if Image is None:
+        shutil.copyfile(source, target)
+        return
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        image.thumbnail((AVATAR_SIZE, AVATAR_SIZE), Image.LANCZOS)
+        image.save(target, "JPEG", quality=AVATAR_QUALITY, optimize=True, progressive=True)
+
+
+def build_thumbnails(files, assets_dir=ASSETS_DIR, avatar_dir=AVATAR_DIR):
+    # Returns {file name: URL}; thumbnails already on disk are reused
+    os.makedirs(avatar_dir, exist_ok=True)
+    urls = {}
+    for name in files:
+        source = os.path.join(assets_dir, name)
+        try:
+            with open(source, "rb") as f:
+                thumbnail = _thumbnail_name(source, f.read())
+            target = os.path.join(avatar_dir, thumbnail)
+            if not os.path.exists(target):
+                tmp = f"{target}.{os.getpid()}.tmp"
+                _write_thumbnail(source, tmp)
+                os.replace(tmp, target)
+        except OSError as exc:
+            logger.warning("No thumbnail for %s (%s); the card shows a placeholder", name, exc)
+            continue
+        urls[name] = f"/avatars/{thumbnail}"
+    return urls
+
+
+def _build_pending():
+    with _lock:
+        if _pending:
+            _urls.update(build_thumbnails(_pending))
+            _pending.clear()
+
+
+def avatar_url(file_name):
+    if _pending:
+        _build_pending()
+    return _urls.get(file_name)
+
+
+def register_avatars(server, files):
+    # Serve thumbnails of files with immutable cache headers; they are built on first use
+    with _lock:
+        _pending.extend(files)
+
+    @server.route("/avatars/<path:filename>")
+    def avatar(filename):
+        if _pending:
+            _build_pending()
+        response = send_from_directory(os.path.abspath(AVATAR_DIR), filename)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+
+if __name__ == "__main__":
+    from mian_dashboard_working import photo_mapping
+
+    for name, url in build_thumbnails(photo_mapping.values()).items():
+        print(f"{name} -> {url}")
@@ -0,0 +1,97 @@
+# In-process stand-in for the gspread client, serving synthetic workbook
+# values with an injectable per-request latency and an optional per-minute
+# quota that answers 429 like the real API. Only the calls the data layer
+# makes are implemented.
+
+import collections
+import datetime
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    # Shaped like gspread.exceptions.APIError: the HTTP response is on .response
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+
+class FakeWorksheet:
+    def __init__(self, book, title):
+        self.book = book
+        self.title = title
+
+    def get_all_values(self):
+        self.book.client._request("get_all_values")
+        return [list(row) for row in self.book.values[self.title]]
+
+    def append_rows(self, rows, value_input_option=None, **kwargs):
+        self.book.client._request("append_rows")
+        with self.book.lock:
+            self.book.values[self.title].extend([str(v) for v in row] for row in rows)
+            self.book.touch()
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title, values):
+        self.client = client
+        self.title = title
+        self.values = values
+        self.lock = threading.Lock()
+        self.touch()
+
+    def touch(self):
+        self.modified = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def get_lastUpdateTime(self):
+        self.client._request("get_lastUpdateTime")
+        return self.modified
+
+    def worksheet(self, title):
+        self.client._request("worksheet")
+        if title not in self.values:
+            raise KeyError(title)
+        return FakeWorksheet(self, title)
+
+    def values_batch_get(self, ranges, params=None):
+        self.client._request("values_batch_get")
+        value_ranges = []
+        for rng in ranges:
+            title = rng.strip("'")
+            value_ranges.append({"range": rng, "values": [list(row) for row in self.values[title]]})
+        return {"spreadsheetId": self.title, "valueRanges": value_ranges}
+
+
+class FakeClient:
+    def __init__(self, workbooks, latency=0.0, quota_per_minute=None):
+        # workbooks: {spreadsheet name: {tab: values}}
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.calls = {}
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+        self._books = {name: FakeSpreadsheet(self, name, values) for name, values in workbooks.items()}
+
+    def _request(self, method):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if self.quota_per_minute is not None:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_minute:
+                    self.calls["rejected"] = self.calls.get("rejected", 0) + 1
+                    raise FakeAPIError(429, {"Retry-After": "1"})
+                self._recent.append(now)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def open(self, name):
+        self._request("open")
+        return self._books[name]
@@ -0,0 +1,249 @@
+# Times the dashboards against synthetic workbooks served by the fake Sheets
+# client, so performance can be tracked without Google credentials.
+#
+#   python -m benchmarks.run_benchmarks --scales 100,1000,10000,100000 --latency 0.2
+#
+# Every callback is driven through the Flask test client with the same JSON a
+# browser sends, so timings include Dash dispatch and response serialization.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Keep the issue queue and snapshots out of the working tree, and never flush in the background
+_tmp = tempfile.mkdtemp(prefix="dashboard-bench-")
+os.environ.setdefault("ISSUE_QUEUE_PATH", os.path.join(_tmp, "issue_queue.db"))
+os.environ.setdefault("WORKBOOK_SNAPSHOT_DIR", os.path.join(_tmp, "snapshots"))
+os.environ.setdefault("AVATAR_CACHE_DIR", os.path.join(_tmp, "avatars"))
+os.environ.setdefault("HISTORY_PATH", os.path.join(_tmp, "history.db"))
+os.environ.setdefault("ISSUE_FLUSH_IN_PROCESS", "0")
+os.environ.setdefault("WORKBOOK_BACKEND", "sheets")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import mian_dashboard_working  # noqa: E402
+import workbook_backends  # noqa: E402
+import workbook_data  # noqa: E402
+from benchmarks.fake_sheets import FakeClient  # noqa: E402
+from benchmarks.synthetic_workbook import generate  # noqa: E402
+
+
+def dash_payload(outputs, inputs, state=()):
+    outs = [{"id": i, "property": p} for i, p in outputs]
+    if len(outs) == 1:
+        output, outs = f"{outputs[0][0]}.{outputs[0][1]}", outs[0]
+    else:
+        output = ".." + "...".join(f"{i}.{p}" for i, p in outputs) + ".."
+    return {
+        "output": output,
+        "outputs": outs,
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+    }
+
+
+def route(pathname):
+    return dash_payload([("page-content", "children"), ("project", "data")], [("url", "pathname", pathname)])
+
+
+def dashboard_tick(version=None, gantt_state=None, roster=None):
+    return dash_payload(
+        [("gantt-data", "data"), ("active-team-members", "children"),
+         ("dashboard-version", "data"), ("gantt-state", "data"), ("member-roster", "data")],
+        [("interval-refresh", "n_intervals", 1), ("live-version", "data", None)],
+        [("project", "data", None), ("dashboard-version", "data", version), ("gantt-state", "data", gantt_state),
+         ("member-roster", "data", roster)],
+    )
+
+
+def activity_store():
+    return dash_payload(
+        [("activity-store", "data"), ("activity-store-version", "data")],
+        [("interval-refresh", "n_intervals", 1), ("live-version", "data", None)],
+        [("project", "data", None), ("activity-store-version", "data", None)],
+    )
+
+
+def issues_table(n_clicks=None, trigger="issues-table"):
+    inputs = [
+        ("submit-issue", "n_clicks", n_clicks), ("issues-table", "page_current", 0),
+        ("issues-table", "page_size", 25), ("issues-table", "sort_by", []),
+        ("issues-table", "filter_query", ""), ("live-version", "data", None),
+    ]
+    payload = dash_payload(
+        [("issues-table", "data"), ("issues-table", "page_count")], inputs,
+        [("project", "data", None), ("issue-desc", "value", "Benchmark issue"), ("issue-severity", "value", "Low"),
+         ("issue-reported-by", "value", "bench")],
+    )
+    payload["changedPropIds"] = ["submit-issue.n_clicks" if trigger == "submit-issue" else "issues-table.page_current"]
+    return payload
+
+
+def burndown():
+    return dash_payload(
+        [("milestone-burndown", "figure")],
+        [("interval-refresh", "n_intervals", 1), ("live-version", "data", None)],
+        [("project", "data", None)],
+    )
+
+
+def risk_table():
+    return dash_payload(
+        [("risk-table", "data"), ("risk-table", "page_count")],
+        [("risk-table", "page_current", 0), ("risk-table", "page_size", 25),
+         ("risk-table", "sort_by", [{"column_id": "Impact (1-5)", "direction": "desc"}]),
+         ("risk-table", "filter_query", ""), ("live-version", "data", None)],
+        [("project", "data", None)],
+    )
+
+
+def measure(func, repeat):
+    times, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func() or 0
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "max_ms": times[-1] * 1000,
+        "bytes": size,
+    }
+
+
+def measure_burst(clients, payloads):
+    # Fires every payload at once from its own thread, like a room of tabs opening together
+    latencies, errors = [], []
+    barrier = threading.Barrier(len(payloads))
+
+    def worker(client, payload):
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.post("/_dash-update-component", json=payload)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code not in (200, 204):
+            errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(c, p)) for c, p in zip(clients, payloads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return {
+        "median_ms": statistics.median(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+        "errors": len(errors),
+    }
+
+
+def run_burst(rows, latency, size, quota):
+    # Cold cache, then `size` simultaneous page loads against a quota-limited fake
+    client = FakeClient({workbook_data.WORKBOOK_NAME: generate(rows)}, latency=latency, quota_per_minute=quota)
+    workbook_backends.set_client(client)
+    workbook_data.use_cache(workbook_data.WorkbookCache(workbook_backends.SheetsBackend(workbook_data.WORKBOOK_NAME)))
+    paths = ["/dashboard", "/risks", "/issues"]
+    payloads = [route(paths[i % len(paths)]) for i in range(size)]
+    result = measure_burst([app.server.test_client() for _ in payloads], payloads)
+    return result, dict(client.calls)
+
+
+def run_scale(rows, latency, repeat):
+    client = FakeClient({workbook_data.WORKBOOK_NAME: generate(rows)}, latency=latency)
+    workbook_backends.set_client(client)
+    workbook_data.use_cache(workbook_data.WorkbookCache(workbook_backends.SheetsBackend(workbook_data.WORKBOOK_NAME)))
+    test_client = app.server.test_client()
+
+    def post(payload):
+        response = test_client.post("/_dash-update-component", json=payload)
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{payload['output']}: HTTP {response.status_code}")
+        return len(response.data)
+
+    def cold_load():
+        workbook_data.invalidate()
+        workbook_data.cache_for().refresh()
+
+    def dashboard_full():
+        mian_dashboard_working._gantt_cache.clear()
+        return post(dashboard_tick())
+
+    rendered = test_client.post("/_dash-update-component", json=dashboard_tick()).get_json()["response"]
+    version = rendered["dashboard-version"]["data"]
+    gantt_state = rendered["gantt-state"]["data"]
+    roster = rendered["member-roster"]["data"]
+    book = client._books[workbook_data.WORKBOOK_NAME]
+    edited = {"gantt_state": gantt_state, "count": 0}
+
+    def milestone_edited():
+        # One milestone's progress changes; the browser has the previous render
+        edited["count"] += 1
+        book.values["Milestones"][1][-1] = str(edited["count"] % 100 / 100)
+        book.touch()
+        workbook_data.invalidate()
+        response = test_client.post("/_dash-update-component", json=dashboard_tick(None, edited["gantt_state"], roster))
+        edited["gantt_state"] = response.get_json()["response"]["gantt-state"]["data"]
+        return len(response.data)
+
+    results = {
+        "cold_load": measure(cold_load, repeat),
+        "update_dashboard (rebuild)": measure(dashboard_full, repeat),
+        "update_dashboard (memoized)": measure(lambda: post(dashboard_tick()), repeat),
+        "update_dashboard (same roster)": measure(lambda: post(dashboard_tick(None, gantt_state, roster)), repeat),
+        "update_dashboard (no-op tick)": measure(lambda: post(dashboard_tick(version, gantt_state, roster)), repeat),
+        "activity store": measure(lambda: post(activity_store()), repeat),
+        "burndown": measure(lambda: post(burndown()), repeat),
+        "risk table page": measure(lambda: post(risk_table()), repeat),
+        "issues table page": measure(lambda: post(issues_table()), repeat),
+        "issue submit": measure(lambda: post(issues_table(1, "submit-issue")), repeat),
+        "route /dashboard": measure(lambda: post(route("/dashboard")), repeat),
+        "route /risks": measure(lambda: post(route("/risks")), repeat),
+        "route /issues": measure(lambda: post(route("/issues")), repeat),
+    }
+    # Edits the data, so it runs last
+    results["update_dashboard (one edited)"] = measure(milestone_edited, repeat)
+    return results, dict(client.calls)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default="100,1000,10000", help="comma-separated row counts per tab")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake Sheets request")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=50, help="simultaneous cold page loads (0 to skip)")
+    parser.add_argument("--quota", type=int, default=60, help="fake Sheets requests allowed per minute in the burst")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for rows in [int(s) for s in args.scales.split(",")]:
+        results, calls = run_scale(rows, args.latency, args.repeat)
+        report[rows] = {"results": results, "sheets_calls": calls}
+        print(f"\n== {rows} rows per tab (latency {args.latency:.3f}s) ==")
+        print(f"{'benchmark':32} {'median ms':>10} {'max ms':>10} {'bytes':>10}")
+        for name, r in results.items():
+            print(f"{name:32} {r['median_ms']:10.1f} {r['max_ms']:10.1f} {r['bytes']:10d}")
+        print(f"sheets calls: {calls}")
+        if args.burst:
+            burst, burst_calls = run_burst(rows, args.latency, args.burst, args.quota)
+            report[rows]["burst"] = {"results": burst, "sheets_calls": burst_calls}
+            print(f"{args.burst} simultaneous cold loads: median {burst['median_ms']:.1f} ms, "
+                  f"max {burst['max_ms']:.1f} ms, wall {burst['wall_ms']:.1f} ms, errors {burst['errors']}")
+            print(f"sheets calls: {burst_calls}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
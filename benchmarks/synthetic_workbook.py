@@ -0,0 +1,95 @@
+# Synthetic Project_Planning_Workbook contents at a chosen scale.
+# Values are returned the way the Sheets API returns them: a header row plus
+# rows of formatted strings, one list per tab.
+
+import datetime
+import random
+
+PEOPLE = [
+    ("Lavjit Singh", "Project Director"), ("Adel Gamal", "Project Manager"),
+    ("Don Sunny", "Senior Consultant"), ("Ganesh Shinde", "Consultant"),
+    ("Samuel Ezannaya", "Consultant"), ("Stefan Stroobants", "Architect"),
+    ("Jaco Roesch", "Data Lead"), ("Gustav Brand", "Analyst"), ("Seyed Khali", "Analyst"),
+]
+
+HEADERS = {
+    "Milestones": ["Milestone ID", "Milestone Name", "Phase", "Start Date", "End Date", "Overall Progress"],
+    # The live sheet spells this header "Mielstone ID"; keep it so the alias path is exercised
+    "Activities": ["Activity ID", "Mielstone ID", "Activity Name", "Assigned To", "Start Date",
+                   "End Date", "Progress"],
+    "References": ["Person Name", "Role"],
+    "Risk_Register": ["Risk ID", "Workstream", "Activity Code", "Activity Name", "Risk Description",
+                      "Risk Category", "Likelihood (1-5)", "Impact (1-5)", "Risk Score", "Risk Level",
+                      "Mitigation Plan", "Contingency Plan", "Owner", "Status",
+                      "Target Resolution Date", "Last Updated", "Comments"],
+    "Issue_Tracker": ["Issue ID", "Workstream", "Activity Name", "Issue Description", "Reported By",
+                      "Assigned To", "Date Reported", "Severity", "Impact Area", "Root Cause",
+                      "Resolution Plan", "Target Resolution Date", "Status", "Actual Resolution Date",
+                      "Escalated (Yes/No)", "Comments / Updates"],
+}
+
+
+def _date(base, days):
+    return (base + datetime.timedelta(days=days)).isoformat()
+
+
+def _risk_level(score):
+    return "High" if score >= 11 else "Medium" if score >= 6 else "Low"
+
+
+def generate(rows, seed=0, today=None):
+    # Every tab gets `rows` data rows, except References which lists PEOPLE
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    base = today - datetime.timedelta(days=365)
+    names = [p[0] for p in PEOPLE]
+
+    milestones = [HEADERS["Milestones"]]
+    for i in range(rows):
+        start = rng.randint(0, 600)
+        milestones.append([
+            f"M{i + 1:05d}", f"Milestone {i + 1}", f"P{i % 6 + 1}",
+            _date(base, start), _date(base, start + rng.randint(5, 120)),
+            str(rng.choice([0, 0.1, 0.25, 0.5, 0.75, 1])),
+        ])
+
+    activities = [HEADERS["Activities"]]
+    for i in range(rows):
+        start = rng.randint(0, 600)
+        assigned = ", ".join(rng.sample(names, rng.randint(1, 2)))
+        activities.append([
+            f"A{i + 1:05d}", f"M{rng.randint(1, max(rows, 1)):05d}", f"Activity {i + 1}", assigned,
+            _date(base, start), _date(base, start + rng.randint(1, 30)),
+            str(rng.choice([0, 0.5, 1])),
+        ])
+
+    references = [HEADERS["References"]] + [list(p) for p in PEOPLE]
+
+    risks = [HEADERS["Risk_Register"]]
+    for i in range(rows):
+        likelihood, impact = rng.randint(1, 5), rng.randint(1, 5)
+        score = likelihood * impact
+        risks.append([
+            f"R-{i + 1:05d}", f"WS{i % 5 + 1}", f"AC{i % 40}", f"Activity {i % 300}",
+            f"Risk description {i + 1}", rng.choice(["Governance", "Data Quality", "Resourcing"]),
+            str(likelihood), str(impact), str(score), _risk_level(score),
+            "Mitigate", "Escalate", rng.choice(names), rng.choice(["Open", "Open", "Closed"]),
+            _date(today, rng.randint(0, 180)), _date(base, rng.randint(0, 365)), "",
+        ])
+
+    issues = [HEADERS["Issue_Tracker"]]
+    for i in range(rows):
+        issues.append([
+            f"ISSUE-{i + 1:03d}", f"WS{i % 5 + 1}", f"Activity {i % 300}", f"Issue description {i + 1}",
+            rng.choice(names), rng.choice(names), _date(base, rng.randint(0, 365)),
+            rng.choice(["High", "Medium", "Low"]), "", "", "", "",
+            rng.choice(["Open", "Open", "Closed"]), "", "No", "",
+        ])
+
+    return {
+        "Milestones": milestones,
+        "Activities": activities,
+        "References": references,
+        "Risk_Register": risks,
+        "Issue_Tracker": issues,
+    }
@@ -0,0 +1,232 @@
+# Change history of the workbook tabs, for trend and burndown charts.
+# Each new version of a tab is diffed against the rows currently open in the
+# store and only changed rows are written, as (valid_from, valid_to) row
+# versions keyed on the tab's ID column. A snapshot that changed nothing
+# costs one token comparison, so store size follows edits, not polling.
+# Trend queries read the row versions overlapping a window through the
+# time indexes and sample them with a cumulative sweep, so their cost
+# depends on the window's rows and edits, not on how many snapshots exist.
+#
+# Stored in SQLite (WAL, so serving workers read while the publisher writes)
+# rather than Parquet, which would need pyarrow.
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import workbook_data
+
+HISTORY_PATH = os.environ.get("HISTORY_PATH", "workbook_history.db")
+# Days shown by the trend charts
+HISTORY_DAYS = int(os.environ.get("HISTORY_DAYS", 90))
+# Only the process that owns the backend records; serving workers just read
+RECORD_IN_PROCESS = os.environ.get("HISTORY_RECORD_IN_PROCESS", "1") == "1"
+
+# Column identifying a row across versions of each tab
+ROW_KEYS = {
+    "Milestones": "Milestone ID",
+    "Activities": "Activity ID",
+    "References": "Person Name",
+    "Risk_Register": "Risk ID",
+    "Issue_Tracker": "Issue ID",
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_recording_on = None  # registry the recorder was added to
+_schema_ready = set()  # store paths this process has created the schema in
+
+
+def _connect():
+    # Recorder's connection, in autocommit mode: record() opens its own
+    # BEGIN IMMEDIATE transactions. The schema is set up once per process.
+    conn = sqlite3.connect(HISTORY_PATH, timeout=30, isolation_level=None)
+    if HISTORY_PATH in _schema_ready:
+        return conn
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS versions ("
+        " project TEXT NOT NULL, tab TEXT NOT NULL, token TEXT NOT NULL, taken_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS rows ("
+        " project TEXT NOT NULL, tab TEXT NOT NULL, row_key TEXT NOT NULL, row_hash INTEGER NOT NULL,"
+        " valid_from REAL NOT NULL, valid_to REAL, payload TEXT NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS versions_time ON versions (project, tab, taken_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS rows_open ON rows (project, tab, valid_to, row_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS rows_from ON rows (project, tab, valid_from)")
+    conn.execute("CREATE INDEX IF NOT EXISTS rows_to ON rows (project, tab, valid_to, valid_from)")
+    _schema_ready.add(HISTORY_PATH)
+    return conn
+
+
+def _read(query, params):
+    # Readers only query: no schema setup, and nothing to read before the first recording
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    conn = sqlite3.connect(HISTORY_PATH, timeout=30)
+    try:
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _row_keys(tab, df):
+    # ID column value, made unique by occurrence; row position where there is no ID
+    column = ROW_KEYS.get(tab)
+    if column not in df.columns:
+        return [f"#{i}" for i in range(len(df))]
+    ids = df[column].astype(str).str.strip().where(df[column].notna(), "")
+    occurrence = ids.groupby(ids).cumcount()
+    return [key if n == 0 else f"{key}#{n}" for key, n in zip(ids.tolist(), occurrence.tolist())]
+
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _record_tab(conn, project, tab, df, now):
+    keys = _row_keys(tab, df)
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64).tolist()
+    current = dict(conn.execute(
+        "SELECT row_key, row_hash FROM rows WHERE project = ? AND tab = ? AND valid_to IS NULL",
+        (project, tab)
+    ))
+    latest = dict(zip(keys, hashes))
+    closed = [key for key, row_hash in current.items() if latest.get(key) != row_hash]
+    changed = [i for i, (key, row_hash) in enumerate(zip(keys, hashes)) if current.get(key) != row_hash]
+    conn.executemany(
+        "UPDATE rows SET valid_to = ? WHERE project = ? AND tab = ? AND row_key = ? AND valid_to IS NULL",
+        [(now, project, tab, key) for key in closed]
+    )
+    if changed:
+        # Plain Python values so floats round-trip exactly; dates are stored as ISO text
+        rows = df.iloc[changed]
+        payloads = rows.astype(object).where(rows.notna(), None).to_dict("records")
+        conn.executemany(
+            "INSERT INTO rows (project, tab, row_key, row_hash, valid_from, payload) VALUES (?, ?, ?, ?, ?, ?)",
+            [(project, tab, keys[i], hashes[i], now, json.dumps(payload, default=_iso))
+             for i, payload in zip(changed, payloads)]
+        )
+    return len(changed), len(closed)
+
+
+def _last_token(conn, project, tab):
+    row = conn.execute(
+        "SELECT token FROM versions WHERE project = ? AND tab = ? ORDER BY taken_at DESC LIMIT 1",
+        (project, tab)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def record(project, frames, tokens, now=None):
+    # Data layer listener: store the rows of every tab whose token changed.
+    # Each tab is compared and written under BEGIN IMMEDIATE, so even two
+    # recording processes cannot both see the old open rows and insert twice.
+    now = time.time() if now is None else now
+    with _lock:
+        conn = _connect()
+        try:
+            for tab, df in frames.items():
+                token = tokens[tab]
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if token == _last_token(conn, project, tab):
+                        conn.rollback()
+                        continue
+                    written, closed = _record_tab(conn, project, tab, df, now)
+                    conn.execute(
+                        "INSERT INTO versions (project, tab, token, taken_at) VALUES (?, ?, ?, ?)",
+                        (project, tab, token, now)
+                    )
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                logger.debug("History %s/%s: %d rows written, %d closed", project, tab, written, closed)
+        finally:
+            conn.close()
+
+
+def start_recording():
+    # Record every load of the current registry; a registry installed later
+    # by workbook_data.use_factory starts without the recorder
+    global _recording_on
+    with _lock:
+        if _recording_on is not workbook_data.registry:
+            workbook_data.add_listener(record)
+            _recording_on = workbook_data.registry
+
+
+# --- Queries ---
+def last_recorded(project, tab):
+    # Time the tab last changed in the store; None before its first version
+    rows = _read("SELECT MAX(taken_at) FROM versions WHERE project = ? AND tab = ?", (project, tab))
+    return rows[0][0] if rows else None
+
+
+def row_versions(project, tab, start, end, fields):
+    # Row versions alive at some point in [start, end], with the given payload fields.
+    # Read as two ranges of the rows_to index (still open, and closed after
+    # start), so versions that ended before the window are never visited.
+    columns = ", ".join(f"json_extract(payload, '$.\"{field}\"')" for field in fields)
+    select = f"SELECT valid_from, valid_to, {columns} FROM rows WHERE project = ? AND tab = ?"
+    rows = _read(
+        f"{select} AND valid_to IS NULL AND valid_from <= ?"
+        f" UNION ALL {select} AND valid_to > ? AND valid_from <= ?",
+        (project, tab, end, project, tab, start, end)
+    )
+    return pd.DataFrame(rows, columns=["valid_from", "valid_to", *fields])
+
+
+def sample_times(days=HISTORY_DAYS, now=None):
+    # One point per day, ending now
+    now = time.time() if now is None else now
+    return now - 86400.0 * np.arange(days, -1, -1)
+
+
+def _alive_sum(versions, weights, times):
+    # Sum of weights over row versions alive at each time: weights enter at
+    # valid_from and leave at valid_to, so it is two cumulative sums
+    starts = versions["valid_from"].to_numpy(dtype=float)
+    ends = versions["valid_to"].fillna(np.inf).to_numpy(dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    order_in, order_out = np.argsort(starts), np.argsort(ends)
+    entered = np.concatenate([[0.0], np.cumsum(weights[order_in])])
+    left = np.concatenate([[0.0], np.cumsum(weights[order_out])])
+    return (entered[np.searchsorted(starts[order_in], times, side="right")]
+            - left[np.searchsorted(ends[order_out], times, side="right")])
+
+
+def burndown(project=None, days=HISTORY_DAYS, now=None):
+    # Daily unfinished milestones and remaining work (sum of 1 - progress)
+    project = project or workbook_data.DEFAULT_PROJECT
+    times = sample_times(days, now)
+    versions = row_versions(project, "Milestones", times[0], times[-1], ["Overall Progress"])
+    progress = pd.to_numeric(versions["Overall Progress"], errors="coerce").fillna(0).clip(0, 1)
+    return pd.DataFrame({
+        "time": pd.to_datetime(times, unit="s"),
+        "open_milestones": _alive_sum(versions, progress < 1, times),
+        "remaining_work": _alive_sum(versions, 1 - progress, times),
+    })
+
+
+def risk_trend(project=None, days=HISTORY_DAYS, now=None, levels=("High", "Medium", "Low")):
+    # Daily count of risks not closed, per risk level
+    project = project or workbook_data.DEFAULT_PROJECT
+    times = sample_times(days, now)
+    versions = row_versions(project, "Risk_Register", times[0], times[-1], ["Risk Level", "Status"])
+    level = versions["Risk Level"].astype(str).str.strip().str.lower()
+    is_open = versions["Status"].astype(str).str.strip().str.lower() != "closed"
+    trend = pd.DataFrame({"time": pd.to_datetime(times, unit="s")})
+    for name in levels:
+        trend[name] = _alive_sum(versions, is_open & (level == name.lower()), times)
+    return trend
@@ -1,18 +1,17 @@
-import datetime
+import os
 
 import dash
-from dash import dcc, html, Input, Output, State, dash_table
+from dash import dcc, html, Input, Output, State, dash_table, ctx
 import dash_bootstrap_components as dbc
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 
-# Google Sheets auth
-SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-CREDS = ServiceAccountCredentials.from_json_keyfile_name('credentials.json', SCOPES)
-GS_CLIENT = gspread.authorize(CREDS)
-SPREADSHEET = GS_CLIENT.open("Project_Planning_Workbook")
-ISSUE_WS = SPREADSHEET.worksheet("Issue_Tracker")
+import issue_queue
+import metrics
+import workbook_data
+from table_paging import page_frame
+
+ISSUE_TABLE_COLUMNS = ["Issue ID", "Issue Description", "Severity", "Date Reported"]
+ISSUE_PAGE_SIZE = int(os.environ.get("ISSUE_PAGE_SIZE", 25))
 
 # Layout for Issue Tracker page
 def issue_dashboard():
@@ -53,11 +52,12 @@ def issue_dashboard():
         dbc.CardBody(
             dash_table.DataTable(
                 id="issues-table",
-                columns=[
-                    {"name": c, "id": c}
-                    for c in ["Issue ID", "Issue Description", "Severity", "Date Reported"]
-                ],
+                columns=[{"name": c, "id": c} for c in ISSUE_TABLE_COLUMNS],
                 data=[],
+                # Paging, sorting and filtering run on the server against the cached frame
+                page_action="custom", page_current=0, page_size=ISSUE_PAGE_SIZE,
+                sort_action="custom", sort_mode="multi", sort_by=[],
+                filter_action="custom", filter_query="",
                 style_table={"overflowY": "auto", "maxHeight": "300px"},
                 style_cell={"textAlign": "left", "padding": "5px"},
                 style_header={"backgroundColor": "#E6E6E6", "fontWeight": "bold"}
@@ -71,47 +71,41 @@ def issue_dashboard():
         table
     ], fluid=True)
 
+# Open sheet issues, recomputed only when the Issue_Tracker tab changes
+def _open_sheet_issues(df):
+    status = df['Status'].astype(str).str.lower().str.strip()
+    return df.loc[status == 'open', ISSUE_TABLE_COLUMNS]
+
+def open_issues(project=None):
+    df = workbook_data.derived('open_issues', (issue_queue.ISSUE_TAB,), _open_sheet_issues, project=project)
+    # Overlay submissions still queued for the sheet
+    pending = [i for i in issue_queue.pending_issues(project) if str(i.get("Status", "")).lower().strip() == "open"]
+    if pending:
+        df = pd.concat([df, pd.DataFrame(pending).reindex(columns=ISSUE_TABLE_COLUMNS)], ignore_index=True)
+    return df
+
 # Callback to handle submission & refresh table
 def register_issue_callbacks(app: dash.Dash):
     @app.callback(
         Output("issues-table", "data"),
+        Output("issues-table", "page_count"),
         Input("submit-issue", "n_clicks"),
+        Input("issues-table", "page_current"),
+        Input("issues-table", "page_size"),
+        Input("issues-table", "sort_by"),
+        Input("issues-table", "filter_query"),
+        Input("live-version", "data"),
+        State("project", "data"),
         State("issue-desc", "value"),
         State("issue-severity", "value"),
         State("issue-reported-by", "value")
     )
-    def update_issues_table(n_clicks, desc, sev, reporter):
-        # Always reload sheet
-        values = ISSUE_WS.get_all_values()
-        headers = values[0]
-        rows = values[1:]
-        df = pd.DataFrame(rows, columns=headers)
-
-        # On submission, append a new row
-        if n_clicks:
-            # Generate next Issue ID
-            existing_ids = [r[0] for r in rows if r[0].startswith("ISSUE-")]
-            nums = [int(i.split("-")[1]) for i in existing_ids if i.split("-")[1].isdigit()]
-            next_num = max(nums) + 1 if nums else 1
-            issue_id = f"ISSUE-{next_num:03d}"
-            # Date reported
-            date_reported = datetime.date.today().isoformat()
-            # Build new row in sheet's column order
-            new_row = []
-            for col in headers:
-                if col == "Issue ID": new_row.append(issue_id)
-                elif col == "Issue Description": new_row.append(desc or "")
-                elif col == "Severity": new_row.append(sev or "")
-                elif col == "Reported By": new_row.append(reporter or "")
-                elif col == "Date Reported": new_row.append(date_reported)
-                elif col == "Status": new_row.append("Open")
-                else: new_row.append("")
-            ISSUE_WS.append_row(new_row, value_input_option="USER_ENTERED")
-            # Reload df after append
-            values = ISSUE_WS.get_all_values()
-            df = pd.DataFrame(values[1:], columns=values[0])
+    @metrics.instrument_callback("update_issues_table")
+    def update_issues_table(n_clicks, page_current, page_size, sort_by, filter_query, live_version,
+                            project, desc, sev, reporter):
+        # On submission, queue the issue; the background worker appends it to the sheet
+        if n_clicks and ctx.triggered_id == "submit-issue":
+            issue_queue.submit(desc, sev, reporter, project)
 
-        # Filter open issues and return required columns
-        df['Status'] = df['Status'].astype(str).str.lower().str.strip()
-        df_open = df[df['Status'] == 'open']
-        return df_open[["Issue ID", "Issue Description", "Severity", "Date Reported"]].to_dict('records')
+        # Cached open issues plus anything still queued, one page at a time
+        return page_frame(open_issues(project), ISSUE_TABLE_COLUMNS, page_current, page_size, sort_by, filter_query)
@@ -0,0 +1,166 @@
+# Write-behind queue for issue submissions.
+# Submissions are committed to a local SQLite file and get their ISSUE-NNN ID
+# from a counter kept in the same file, so every serving process shares it; a
+# background worker appends them to the sheet in batches. Until the sheet
+# shows them, the table overlays the queued rows. Each project has its own
+# queue file and ID sequence.
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import workbook_data
+
+ISSUE_TAB = "Issue_Tracker"
+QUEUE_PATH = os.environ.get("ISSUE_QUEUE_PATH", "issue_queue.db")
+# Seconds between background flushes; a submission also wakes the worker
+FLUSH_INTERVAL = float(os.environ.get("ISSUE_FLUSH_INTERVAL", 5))
+# Largest number of rows sent in one append request
+FLUSH_BATCH_SIZE = int(os.environ.get("ISSUE_FLUSH_BATCH_SIZE", 200))
+# Serving workers that share a queue leave flushing to a single process
+FLUSH_IN_PROCESS = os.environ.get("ISSUE_FLUSH_IN_PROCESS", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_worker = None
+
+
+def queue_path(project=None):
+    project = project or workbook_data.DEFAULT_PROJECT
+    if project == workbook_data.DEFAULT_PROJECT:
+        return QUEUE_PATH
+    root, ext = os.path.splitext(QUEUE_PATH)
+    return f"{root}.{project}{ext}"
+
+
+def _connect(project=None):
+    conn = sqlite3.connect(queue_path(project), timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS issues ("
+        " issue_id TEXT PRIMARY KEY, payload TEXT NOT NULL,"
+        " created REAL NOT NULL, flushed INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS counter (next_num INTEGER NOT NULL)")
+    return conn
+
+
+def _issue_number(issue_id):
+    parts = str(issue_id).split("-")
+    if len(parts) == 2 and parts[0] == "ISSUE" and parts[1].isdigit():
+        return int(parts[1])
+    return 0
+
+
+def _max_sheet_number(df_issues):
+    return max((_issue_number(i) for i in df_issues["Issue ID"].dropna()), default=0)
+
+
+def _sheet_ids(df_issues):
+    return set(df_issues["Issue ID"].dropna().astype(str))
+
+
+def _allocate_id(conn, sheet_max):
+    # Runs inside the submit transaction, so concurrent processes never share an ID
+    row = conn.execute("SELECT next_num FROM counter").fetchone()
+    if row is None:
+        queued = [_issue_number(r[0]) for r in conn.execute("SELECT issue_id FROM issues")]
+        next_num = max(queued, default=0) + 1
+        conn.execute("INSERT INTO counter (next_num) VALUES (?)", (next_num,))
+    else:
+        next_num = row[0]
+    # Rows typed straight into the sheet can move the counter forward
+    num = max(next_num, sheet_max + 1)
+    conn.execute("UPDATE counter SET next_num = ?", (num + 1,))
+    return f"ISSUE-{num:03d}"
+
+
+def submit(desc, severity, reporter, project=None):
+    sheet_max = workbook_data.derived("issue_max_number", (ISSUE_TAB,), _max_sheet_number, project=project)
+    issue = {
+        "Issue Description": desc or "",
+        "Severity": severity or "",
+        "Reported By": reporter or "",
+        "Date Reported": datetime.date.today().isoformat(),
+        "Status": "Open",
+    }
+    conn = _connect(project)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        issue = {"Issue ID": _allocate_id(conn, sheet_max), **issue}
+        conn.execute(
+            "INSERT INTO issues (issue_id, payload, created) VALUES (?, ?, ?)",
+            (issue["Issue ID"], json.dumps(issue), time.time())
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if FLUSH_IN_PROCESS:
+        start_flusher()
+        _wake.set()
+    return issue
+
+
+def pending_issues(project=None):
+    # Queued rows the cached sheet does not show yet, oldest first
+    seen = workbook_data.derived("issue_ids", (ISSUE_TAB,), _sheet_ids, project=project)
+    with _connect(project) as conn:
+        rows = conn.execute("SELECT issue_id, payload, flushed FROM issues ORDER BY created").fetchall()
+        landed = [issue_id for issue_id, _, flushed in rows if flushed and issue_id in seen]
+        if landed:
+            conn.executemany("DELETE FROM issues WHERE issue_id = ?", [(i,) for i in landed])
+    return [json.loads(payload) for issue_id, payload, _ in rows if issue_id not in seen]
+
+
+def flush(project=None):
+    if not os.path.exists(queue_path(project)):
+        return 0
+    with _connect(project) as conn:
+        rows = conn.execute(
+            "SELECT issue_id, payload FROM issues WHERE flushed = 0 ORDER BY created LIMIT ?",
+            (FLUSH_BATCH_SIZE,)
+        ).fetchall()
+    if not rows:
+        return 0
+    # Rows already in the sheet landed on an earlier attempt whose outcome was
+    # not recorded (an error after the append, or a crash before the update)
+    seen = workbook_data.derived("issue_ids", (ISSUE_TAB,), _sheet_ids, project=project)
+    unsent = [(issue_id, payload) for issue_id, payload in rows if issue_id not in seen]
+    if unsent:
+        # Build rows in the sheet's column order
+        headers = list(workbook_data.get_frame(ISSUE_TAB, project=project).columns)
+        issues = [json.loads(payload) for _, payload in unsent]
+        values = [[issue.get(col, "") for col in headers] for issue in issues]
+        workbook_data.append_rows(ISSUE_TAB, values, project=project)
+    with _connect(project) as conn:
+        conn.executemany("UPDATE issues SET flushed = 1 WHERE issue_id = ?", [(r[0],) for r in rows])
+    return len(rows)
+
+
+def _run():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        for project in workbook_data.PROJECTS:
+            try:
+                # Drain everything queued, one batch per append request
+                while flush(project) == FLUSH_BATCH_SIZE:
+                    pass
+            except Exception:
+                logger.exception("Issue flush for project %s failed; will retry", project)
+
+
+def start_flusher():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name="issue-flusher", daemon=True)
+            _worker.start()
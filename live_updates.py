@@ -0,0 +1,87 @@
+# Server-sent events channel announcing new workbook versions.
+# The data layer's change detection publishes a project's version string
+# after every load that changed a tab; each open page holds one /events
+# stream and assets/live_updates.js copies the versions into the
+# 'live-versions' store, so callbacks run only when the project on screen has
+# something new to render. Idle pages cost one keepalive comment per
+# LIVE_KEEPALIVE_SECONDS.
+
+import json
+import os
+import threading
+
+from flask import Response
+
+import metrics
+import workbook_data
+
+# Seconds between keepalive comments; also how quickly dead connections are noticed
+KEEPALIVE_SECONDS = float(os.environ.get("LIVE_KEEPALIVE_SECONDS", 15))
+# Each stream holds a server thread; beyond this, pages fall back to polling
+MAX_STREAMS = int(os.environ.get("LIVE_MAX_STREAMS", 32))
+# Browser reconnect delay after a dropped stream, in milliseconds
+RECONNECT_MS = int(os.environ.get("LIVE_RECONNECT_MS", 5000))
+
+_condition = threading.Condition()
+_versions = {}  # project -> latest version
+_sequence = 0   # bumped on every change, so streams can wait for the next one
+_streams = 0
+
+
+def publish(project, frames, tokens):
+    # Data layer listener: wake every stream with the project's new version
+    global _sequence
+    version = "-".join(tokens[tab] for tab in workbook_data.TABS if tab in tokens)
+    with _condition:
+        if _versions.get(project) != version:
+            _versions[project] = version
+            _sequence += 1
+            _condition.notify_all()
+
+
+def _event(project, version):
+    return f"event: version\ndata: {json.dumps({'project': project, 'version': version})}\n\n"
+
+
+def _stream():
+    yield f"retry: {RECONNECT_MS}\n"
+    sent = {}
+    sequence = None
+    while True:
+        with _condition:
+            if sequence is not None:
+                _condition.wait_for(lambda: _sequence != sequence, timeout=KEEPALIVE_SECONDS)
+            sequence = _sequence
+            changed = {p: v for p, v in _versions.items() if sent.get(p) != v}
+        # The first pass sends every known version, so a reconnecting page catches up
+        for project, version in changed.items():
+            yield _event(project, version)
+        sent.update(changed)
+        if not changed:
+            yield ": keepalive\n\n"
+
+
+def _release():
+    global _streams
+    with _condition:
+        _streams -= 1
+
+
+def register_live_updates(server):
+    workbook_data.add_listener(publish)
+    metrics.gauge("live_update_streams", lambda: _streams)
+
+    @server.route("/events")
+    def events():
+        global _streams
+        with _condition:
+            if _streams >= MAX_STREAMS:
+                metrics.inc("live_update_rejected_total")
+                return Response("Too many live update streams", status=503)
+            _streams += 1
+        response = Response(_stream(), mimetype="text/event-stream")
+        # Called once the client disconnects, whether or not the stream started
+        response.call_on_close(_release)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
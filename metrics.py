@@ -0,0 +1,173 @@
+# In-process performance metrics exposed in Prometheus text format on /metrics.
+#
+# - dashboard_callback_seconds{callback}      wall time of each Dash callback
+# - dashboard_phase_seconds{callback,phase}   sheets_io / parse / figure time inside it
+# - dashboard_request_seconds{output}         full Dash request incl. JSON serialization
+# - dashboard_response_bytes{output}          response payload size
+# - sheets_api_calls_total / sheets_api_errors_total / sheets_api_retries_total{method}
+# - sheets_rate_limit_wait_seconds             time requests queued for the request budget
+# - workbook_cache_requests_total{cache,result}  hit/miss/stale/coalesced counts
+# - workbook_cache_evictions_total              project caches dropped for memory
+#
+# Callbacks slower than SLOW_CALLBACK_SECONDS are logged as warnings.
+
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+SLOW_CALLBACK_SECONDS = float(os.environ.get("SLOW_CALLBACK_SECONDS", 1.0))
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+
+HELP = {
+    "dashboard_callback_seconds": "Dash callback latency",
+    "dashboard_phase_seconds": "Time spent per phase inside callbacks and data loads",
+    "dashboard_request_seconds": "Dash update request latency including serialization",
+    "dashboard_response_bytes": "Dash update response payload size",
+    "sheets_api_calls_total": "Google Sheets API calls",
+    "sheets_api_errors_total": "Google Sheets API calls that raised",
+    "sheets_api_retries_total": "Google Sheets API calls retried after a 429 or 5xx",
+    "sheets_rate_limit_wait_seconds": "Time Sheets requests waited for the client-side rate limiter",
+    "workbook_cache_requests_total": "Workbook cache lookups by result",
+    "workbook_cache_evictions_total": "Project workbook caches dropped to stay within the memory budget",
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_histogram_buckets = {}
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # name -> callable returning a number or None
+_local = threading.local()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = _key(name, labels)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [0] * (len(buckets) + 2)
+            _histogram_buckets[name] = buckets
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                entry[i] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def gauge(name, func):
+    # Register a value read at scrape time
+    _gauges[name] = func
+
+
+def current_callback():
+    return getattr(_local, "callback", "background")
+
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("dashboard_phase_seconds", time.perf_counter() - start,
+                callback=current_callback(), phase=name)
+
+
+def instrument_callback(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_local, "callback", None)
+            _local.callback = name
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _local.callback = outer
+                observe("dashboard_callback_seconds", elapsed, callback=name)
+                if elapsed > SLOW_CALLBACK_SECONDS:
+                    logger.warning("Slow callback %s: %.3fs", name, elapsed)
+        return wrapper
+    return decorator
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = ((k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def render():
+    lines = []
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+    seen = set()
+    for (name, labels), entry in sorted(histograms.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+        for bound, count in zip(_histogram_buckets[name], entry):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {entry[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {entry[-2]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {entry[-1]}")
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for name, func in sorted(_gauges.items()):
+        try:
+            value = func()
+        except Exception:
+            value = None
+        if value is not None:
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def register_metrics(server):
+    # /metrics route plus request-level timing of Dash update calls
+    @server.route("/metrics")
+    def metrics_endpoint():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @server.after_request
+    def _record_request(response):
+        if request.path.endswith("/_dash-update-component"):
+            body = request.get_json(silent=True) or {}
+            output = str(body.get("output", "unknown"))[:120]
+            observe("dashboard_request_seconds", time.perf_counter() - g.metrics_start, output=output)
+            size = response.calculate_content_length()
+            if size is not None:
+                observe("dashboard_response_bytes", size, buckets=SIZE_BUCKETS, output=output)
+        return response
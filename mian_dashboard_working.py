@@ -1,19 +1,33 @@
 # Updated version of mian_dashboard_working.py with two-layer Gantt bars and status legend
 
+import difflib
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
 import dash
-from dash import dcc, html, Input, Output, State, dash_table
+from dash import dcc, html, Input, Output, State, Patch, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
-import plotly.express as px
-import gspread
-from gspread_dataframe import get_as_dataframe
-from oauth2client.service_account import ServiceAccountCredentials
+import numpy as np
 import os
 
+import avatars
+import history_store
+import metrics
+import workbook_data
+
 # Initialize app
 app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
 
+ACTIVITY_PAGE_SIZE = int(os.environ.get("ACTIVITY_PAGE_SIZE", 20))
+# Updates are pushed through the 'live-version' store; polling only covers
+# pages without a live stream and the daily move of the "Today" line
+FALLBACK_REFRESH_MS = int(os.environ.get("FALLBACK_REFRESH_MS", 10 * 60 * 1000))
+
 # Member photos mapping
 photo_mapping = {
     "lavjit singh": "lavjit.jpg",
@@ -27,11 +41,15 @@ photo_mapping = {
     "seyed khali": "seyed.jpg"
 }
 
+# Small content-hashed copies of the photos, served with immutable cache headers;
+# built when the first member card needs one
+avatars.register_avatars(server, photo_mapping.values())
+
 def member_card(name, role):
     key = name.strip().lower()
-    img_file = photo_mapping.get(key)
-    if img_file:
-        img_tag = html.Img(src=f"/assets/{img_file}", height="45px", style={'borderRadius': '50%'})
+    img_src = avatars.avatar_url(photo_mapping.get(key))
+    if img_src:
+        img_tag = html.Img(src=img_src, height="45px", width="45px", style={'borderRadius': '50%'})
     else:
         img_tag = html.Div("👤", style={'fontSize': '2rem'})
     return dbc.Card(
@@ -48,7 +66,18 @@ def member_card(name, role):
 def milestone_dashboard_layout():
     return dbc.Container([
         html.H2("Milestone Dashboard", className="text-center my-4"),
-        dcc.Interval(id='interval-refresh', interval=60*1000, n_intervals=0),
+        dcc.Interval(id='interval-refresh', interval=FALLBACK_REFRESH_MS, n_intervals=0),
+        # Data version the browser last rendered; unchanged versions skip the rebuild
+        dcc.Store(id='dashboard-version'),
+        # Gantt bars the figure is built from, and the key of the model they
+        # match; new models are sent as edits to it
+        dcc.Store(id='gantt-data'),
+        dcc.Store(id='gantt-state'),
+        # Hash of the member roster on screen; an unchanged roster sends no cards
+        dcc.Store(id='member-roster'),
+        # Activities of the charted milestones, so the click modal opens without a server call
+        dcc.Store(id='activity-store'),
+        dcc.Store(id='activity-store-version'),
         dbc.Row([
             dbc.Col([
                 dcc.Graph(id='milestone-gantt-chart'),
@@ -58,132 +87,195 @@ def milestone_dashboard_layout():
                 )
             ], width=12)
         ]),
+        # Daily unfinished milestones from the change history
+        dcc.Graph(id='milestone-burndown'),
         html.Hr(),
         html.H4("Active Team Members", className="mt-4 mb-3"),
         dbc.Row(id='active-team-members'),
         # Modal for Activities
         dbc.Modal([
             dbc.ModalHeader(dbc.ModalTitle(id="modal-title")),
-            dbc.ModalBody(dash_table.DataTable(id='activities-table', style_table={"overflowX": "auto"}))
+            # Rows are already in the browser, so page them there and render one page at a time
+            dbc.ModalBody(dash_table.DataTable(
+                id='activities-table', style_table={"overflowX": "auto"},
+                page_action='native', page_size=ACTIVITY_PAGE_SIZE,
+                sort_action='native', filter_action='native'
+            ))
         ], id="activity-modal", size="xl", is_open=False)
     ], fluid=True)
 
-# Helper to read data from Google Sheets
-def fetch_data():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_name('credentials.json', scope)
-    client = gspread.authorize(creds)
-    book = client.open("Project_Planning_Workbook")
-    df_m = get_as_dataframe(book.worksheet("Milestones")).dropna(how='all')
-    df_a = get_as_dataframe(book.worksheet("Activities")).dropna(how='all')
-    df_r = get_as_dataframe(book.worksheet("References")).dropna(how='all')
-    return df_m, df_a, df_r
+DASHBOARD_TABS = ("Milestones", "Activities", "References")
 
-@app.callback(
-    Output('milestone-gantt-chart', 'figure'),
-    Output('active-team-members', 'children'),
-    Input('interval-refresh', 'n_intervals')
+# Helper to read data from the shared workbook cache
+def fetch_data(project=None):
+    return workbook_data.get_frames(*DASHBOARD_TABS, project=project)
+
+# Color mapping for categories
+color_map = {
+    'Background': 'lightgray',
+    'Not Started': 'lightgray',
+    'In Progress': 'orange',
+    'Overdue': 'red',
+    'Completed': 'green'
+}
+STATUS_ORDER = ['Not Started', 'In Progress', 'Overdue', 'Completed']
+
+# Above this many milestones the chart switches to WebGL line segments
+GANTT_WEBGL_THRESHOLD = int(os.environ.get("GANTT_WEBGL_THRESHOLD", 2000))
+# Rows shown at once in large charts; the rest are reached by panning
+GANTT_VIEWPORT_ROWS = int(os.environ.get("GANTT_VIEWPORT_ROWS", 40))
+
+GANTT_HOVER = (
+    "<b>%{y}</b><br>Start: %{customdata[2]}<br>End: %{customdata[3]}"
+    "<br>Milestone ID: %{customdata[0]}<br>Progress: %{customdata[1]:.0%}"
 )
-def update_dashboard(n):
-    # Load data
-    df_milestones, df_activities, df_references = fetch_data()
-
-    # Preprocess milestone dates and progress
-    df_milestones['Start Date'] = pd.to_datetime(df_milestones['Start Date'], errors='coerce')
-    df_milestones['End Date']   = pd.to_datetime(df_milestones['End Date'], errors='coerce')
-    df_milestones['Overall Progress'] = (
-        pd.to_numeric(df_milestones['Overall Progress'], errors='coerce').fillna(0)
+
+def classify_milestones(df_milestones, today):
+    start = df_milestones['Start Date']
+    end = df_milestones['End Date']
+    prog = df_milestones['Overall Progress']
+    # Overlay runs from the start date up to today, clipped at the end date
+    overlay_end = end.where(end < today, today)
+    before_end = (end > today).to_numpy()
+    status = np.select(
+        [before_end & (prog > 0).to_numpy(), before_end, (prog < 1).to_numpy()],
+        ['In Progress', 'Not Started', 'Overdue'],
+        default='Completed'
     )
-    today = pd.Timestamp.today()
-
-    # Build bars: background and overlay
-    bars = []
-    for _, r in df_milestones.iterrows():
-        start = r['Start Date']
-        end = r['End Date']
-        prog = r['Overall Progress']
-        mid = r['Milestone ID']
-        name = r['Milestone Name']
-
-        # Base bar: always lightgray
-        bars.append({
-            'Milestone Name': name,
-            'Start': start,
-            'End': end,
-            'Category': 'Background',
-            'Milestone ID': mid,
-            'Progress': prog
-        })
-
-        # Determine overlay end date
-        overlay_end = min(today, end)
-        if overlay_end > start:
-            # Determine status for overlay color
-            if today < end:
-                # Before end date
-                if prog > 0:
-                    status = 'In Progress'
-                else:
-                    status = 'Not Started'
-            else:
-                # On or after end date
-                if prog < 1:
-                    status = 'Overdue'
-                else:
-                    status = 'Completed'
-
-            bars.append({
-                'Milestone Name': name,
-                'Start': start,
-                'End': overlay_end,
-                'Category': status,
-                'Milestone ID': mid,
-                'Progress': prog
-            })
-
-    df_combined = pd.DataFrame(bars)
-
-    # Color mapping for categories
-    color_map = {
-        'Background': 'lightgray',
-        'Not Started': 'lightgray',
-        'In Progress': 'orange',
-        'Overdue': 'red',
-        'Completed': 'green'
+    return overlay_end, pd.Series(status, index=df_milestones.index), (overlay_end > start)
+
+def _date_strings(dates):
+    return dates.dt.strftime('%Y-%m-%d').astype(object).where(dates.notna(), None).tolist()
+
+def _bars(df):
+    # One [name, start, end, milestone ID, progress] entry per bar
+    def values(column):
+        return df[column].astype(object).where(df[column].notna(), None).tolist()
+    return [list(bar) for bar in zip(
+        values('Milestone Name'), _date_strings(df['Start Date']), _date_strings(df['End Date']),
+        values('Milestone ID'), df['Overall Progress'].tolist()
+    )]
+
+def _trace_style(category, large):
+    # Everything about a trace except its bars
+    style = {
+        'name': category, 'hovertemplate': GANTT_HOVER + f"<extra>{category}</extra>",
+        'showlegend': category != 'Background', 'legendgroup': category
     }
+    if large:
+        # Each bar is a thick WebGL line segment
+        style.update(type='scattergl', mode='lines+markers',
+                     line={'color': color_map[category], 'width': max(2, 400 // GANTT_VIEWPORT_ROWS)},
+                     marker={'size': 2, 'color': color_map[category]})
+    else:
+        style.update(type='bar', orientation='h', marker={'color': color_map[category]})
+    return style
 
-    # Create Gantt chart
-    fig = px.timeline(
-        df_combined,
-        x_start='Start', x_end='End',
-        y='Milestone Name', color='Category',
-        color_discrete_map=color_map,
-        hover_data={'Milestone ID': True, 'Progress': ':.0%'},
-        custom_data=['Milestone ID']
-    )
-    # Hide background category from legend
-    for trace in fig.data:
-        if trace.name == 'Background':
-            trace.showlegend = False
-
-    fig.update_yaxes(autorange='reversed')
-    fig.update_layout(
-        title='Milestone Gantt Chart with Progress Coloring',
-        xaxis_title='Timeline', xaxis_tickformat='%b %Y',
-        height=500, showlegend=True, legend_title_text='Milestone Status'
-    )
-    # Add "Today" line
-    fig.add_shape(
-        type='line', x0=today, x1=today, y0=0, y1=1,
-        xref='x', yref='paper', line=dict(dash='dot', color='black')
-    )
-    fig.add_annotation(
-        x=today, y=1.02, text='Today', showarrow=False,
-        xref='x', yref='paper'
-    )
+# The server sends the chart as bars ('gantt-data') and the browser builds the
+# figure from them (clientside callback below). Status overlays carry their real end
+# dates and are cut at today in the browser, so a new day only changes the
+# bars whose status changed, and a changed milestone only its own bars.
+def build_gantt_model(df_milestones, today):
+    _, status, has_overlay = classify_milestones(df_milestones, today)
+    large = len(df_milestones) > GANTT_WEBGL_THRESHOLD
+
+    # Base bar: always lightgray
+    traces = [{'style': _trace_style('Background', large), 'clip': False, 'bars': _bars(df_milestones)}]
+    # Overlay bars coloured by status; every status keeps its trace, even
+    # empty, so trace positions are stable for patching
+    overlay = df_milestones[has_overlay]
+    overlay_status = status[has_overlay]
+    for category in STATUS_ORDER:
+        traces.append({'style': _trace_style(category, large), 'clip': True,
+                       'bars': _bars(overlay[overlay_status == category])})
+
+    yaxis = {'autorange': 'reversed', 'type': 'category'}
+    layout = {
+        'title': {'text': 'Milestone Gantt Chart with Progress Coloring'},
+        'xaxis': {'type': 'date', 'title': {'text': 'Timeline'}, 'tickformat': '%b %Y'},
+        'yaxis': yaxis, 'barmode': 'overlay', 'height': 500,
+        'showlegend': True, 'legend': {'title': {'text': 'Milestone Status'}},
+        # Keep the user's zoom and pan when the figure is rebuilt
+        'uirevision': 'gantt',
+    }
+    if large:
+        # Only lay out a window of rows; users pan vertically to see the rest
+        yaxis.update(autorange=False, range=[GANTT_VIEWPORT_ROWS - 0.5, -0.5])
+        layout['dragmode'] = 'pan'
+    return {'today': today.strftime('%Y-%m-%d'), 'large': large, 'layout': layout, 'traces': traces}
+
+def _json_hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+# Recent models keyed on (Milestones token, date). The browser keeps the key
+# of the model it has ('gantt-state'), so the next one is sent as the
+# difference from it. The token is a content hash, so projects with identical
+# milestones share an entry.
+GANTT_CACHE_SIZE = 8
+# Above this share of changed bars a trace is sent whole rather than as edits
+GANTT_PATCH_MAX_CHANGED = 0.5
+_gantt_cache = OrderedDict()
+_gantt_lock = threading.Lock()
+
+def gantt_model(today, project=None):
+    # Returns (key, model)
+    key = (workbook_data.version("Milestones", project=project), today.strftime('%Y-%m-%d'))
+    with _gantt_lock:
+        if key in _gantt_cache:
+            _gantt_cache.move_to_end(key)
+            metrics.inc("workbook_cache_requests_total", cache="gantt_figure", result="hit")
+            return key, _gantt_cache[key]
+    metrics.inc("workbook_cache_requests_total", cache="gantt_figure", result="miss")
+    df_milestones = workbook_data.get_frame("Milestones", project=project)
+    with metrics.phase("figure"):
+        model = build_gantt_model(df_milestones, today)
+    with _gantt_lock:
+        _gantt_cache[key] = model
+        while len(_gantt_cache) > GANTT_CACHE_SIZE:
+            _gantt_cache.popitem(last=False)
+    return key, model
 
-    # Determine active team members
-    df_activities['Progress'] = pd.to_numeric(df_activities['Progress'], errors='coerce').fillna(0)
+def _patch_bars(patched, old, new):
+    # Adds the edits turning old into new to patched, working from the end so
+    # earlier positions stay valid; returns False when a whole trace is cheaper
+    matcher = difflib.SequenceMatcher(None, [tuple(b) for b in old], [tuple(b) for b in new], autojunk=False)
+    edits = [op for op in matcher.get_opcodes() if op[0] != 'equal']
+    if sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in edits) > GANTT_PATCH_MAX_CHANGED * max(len(old), len(new)):
+        return False
+    for tag, i1, i2, j1, j2 in reversed(edits):
+        if tag == 'replace' and i2 - i1 == j2 - j1:
+            for k in range(i2 - i1):
+                patched[i1 + k] = new[j1 + k]
+            continue
+        for i in range(i2 - 1, i1 - 1, -1):
+            del patched[i]
+        for k in range(j2 - j1):
+            patched.insert(i1 + k, new[j1 + k])
+    return True
+
+def gantt_update(model, rendered):
+    # Send only the bars that differ from the model the browser already has
+    with _gantt_lock:
+        old = _gantt_cache.get(tuple(rendered)) if rendered else None
+    if old is None or old['layout'] != model['layout'] or \
+            [t['style'] for t in old['traces']] != [t['style'] for t in model['traces']]:
+        return model
+    patched = Patch()
+    changed = False
+    if old['today'] != model['today']:
+        patched['today'] = model['today']
+        changed = True
+    for i, (old_trace, new_trace) in enumerate(zip(old['traces'], model['traces'])):
+        if old_trace['bars'] == new_trace['bars']:
+            continue
+        changed = True
+        if not _patch_bars(patched['traces'][i]['bars'], old_trace['bars'], new_trace['bars']):
+            patched['traces'][i]['bars'] = new_trace['bars']
+    return patched if changed else dash.no_update
+
+# (name, role) of every referenced person with an unfinished activity,
+# rebuilt only when the Activities or References tab changes
+def _build_roster(df_activities, df_references):
     active = df_activities[df_activities['Progress'] < 1]
     assigned_people = (
         active['Assigned To']
@@ -194,29 +286,204 @@ def update_dashboard(n):
         .str.strip()
         .str.lower()
     )
-    df_references['Person Name Lower'] = df_references['Person Name'].astype(str).str.lower()
-    active_members = df_references[df_references['Person Name Lower'].isin(assigned_people.unique())]
-    cards = [member_card(row['Person Name'], row['Role']) for _, row in active_members.iterrows()]
+    names = df_references['Person Name'].astype(str)
+    active_members = df_references[names.str.lower().isin(assigned_people.unique())]
+    return tuple(zip(active_members['Person Name'], active_members['Role']))
+
+def active_roster(project=None):
+    return workbook_data.derived('active_roster', ("Activities", "References"), _build_roster, project=project)
+
+# Card components for a roster, shared by every response that shows it
+@functools.lru_cache(maxsize=32)
+def member_cards(roster):
+    return [member_card(name, role) for name, role in roster]
+
+@app.callback(
+    Output('gantt-data', 'data'),
+    Output('active-team-members', 'children'),
+    Output('dashboard-version', 'data'),
+    Output('gantt-state', 'data'),
+    Output('member-roster', 'data'),
+    Input('interval-refresh', 'n_intervals'),
+    Input('live-version', 'data'),
+    State('project', 'data'),
+    State('dashboard-version', 'data'),
+    State('gantt-state', 'data'),
+    State('member-roster', 'data')
+)
+@metrics.instrument_callback("update_dashboard")
+def update_dashboard(n, live_version, project, rendered_version, rendered_gantt, rendered_roster):
+    # The "Today" line moves daily, so the date is part of the version too
+    today = pd.Timestamp.today().normalize()
+    version = f"{workbook_data.version(*DASHBOARD_TABS, project=project)}-{today.date()}"
+    if version == rendered_version:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
+    gantt_state, model = gantt_model(today, project)
+    gantt = gantt_update(model, rendered_gantt)
+
+    # Determine active team members; the browser keeps its cards if nobody changed
+    roster = active_roster(project)
+    roster_hash = _json_hash(roster)
+    if roster_hash == rendered_roster:
+        return gantt, dash.no_update, version, gantt_state, dash.no_update
+
+    return gantt, member_cards(roster), version, gantt_state, roster_hash
+
+# Burndown from the history store, rebuilt when the Milestones history gains
+# a version or the day changes
+def build_burndown_figure(trend):
+    x = trend['time'].dt.strftime('%Y-%m-%d %H:%M').tolist()
+    return {
+        'data': [
+            {'type': 'scatter', 'mode': 'lines', 'name': 'Unfinished milestones',
+             'x': x, 'y': trend['open_milestones'].tolist(), 'line': {'color': 'orange'}},
+            {'type': 'scatter', 'mode': 'lines', 'name': 'Remaining work',
+             'x': x, 'y': trend['remaining_work'].round(2).tolist(), 'line': {'color': 'gray', 'dash': 'dot'}},
+        ],
+        'layout': {
+            'title': {'text': f"Burndown (last {history_store.HISTORY_DAYS} days)"},
+            'height': 320,
+            'margin': {'l': 50, 'r': 20, 't': 50, 'b': 40},
+            'xaxis': {'type': 'date'},
+            'yaxis': {'title': {'text': 'Milestones'}, 'rangemode': 'tozero'},
+            'legend': {'orientation': 'h', 'y': -0.2},
+        },
+    }
 
-    return fig, cards
+@functools.lru_cache(maxsize=16)
+def _burndown_figure(project, recorded_at, day):
+    with metrics.phase("history"):
+        trend = history_store.burndown(project)
+    return build_burndown_figure(trend)
+
+def burndown_figure(project=None):
+    project = project or workbook_data.DEFAULT_PROJECT
+    recorded_at = history_store.last_recorded(project, "Milestones")
+    return _burndown_figure(project, recorded_at, pd.Timestamp.today().date())
 
 @app.callback(
+    Output('milestone-burndown', 'figure'),
+    Input('interval-refresh', 'n_intervals'),
+    Input('live-version', 'data'),
+    State('project', 'data')
+)
+@metrics.instrument_callback("update_burndown")
+def update_burndown(n, live_version, project):
+    return burndown_figure(project)
+
+# Milestone ID -> activity records for the milestones on the chart,
+# rebuilt only when the Milestones or Activities tab changes
+def _build_activity_index(df_milestones, df_activities):
+    columns = [{"name": i, "id": i} for i in df_activities.columns]
+    visible = set(df_milestones['Milestone ID'].dropna().astype(str).str.strip())
+    keys = df_activities['Milestone ID'].astype(str).str.strip()
+    shown = keys.isin(visible)
+    records = df_activities[shown].to_dict('records')
+    index = {}
+    for key, record in zip(keys[shown], records):
+        index.setdefault(key, []).append(record)
+    return {"columns": columns, "index": index}
+
+def activity_index(project=None):
+    return workbook_data.derived('activity_index', ("Milestones", "Activities"), _build_activity_index,
+                                 project=project)
+
+# Ship the activity index to the browser once per data version
+@app.callback(
+    Output('activity-store', 'data'),
+    Output('activity-store-version', 'data'),
+    Input('interval-refresh', 'n_intervals'),
+    Input('live-version', 'data'),
+    State('project', 'data'),
+    State('activity-store-version', 'data')
+)
+@metrics.instrument_callback("update_activity_store")
+def update_activity_store(n, live_version, project, rendered_version):
+    version = workbook_data.version("Milestones", "Activities", project=project)
+    if version == rendered_version:
+        return dash.no_update, dash.no_update
+    return activity_index(project), version
+
+# The Gantt figure is built in the browser from the bars in 'gantt-data',
+# cutting the status overlays at today
+app.clientside_callback(
+    """
+    function(model) {
+        if (!model) {
+            return window.dash_clientside.no_update;
+        }
+        const today = model.today;
+        const data = [];
+        model.traces.forEach(function(trace) {
+            if (!trace.bars.length) {
+                return;
+            }
+            // Overlays run from the start date up to today, clipped at the end date
+            const ends = trace.bars.map(function(bar) {
+                return trace.clip && (bar[2] === null || bar[2] > today) ? today : bar[2];
+            });
+            const custom = trace.bars.map(function(bar, i) {
+                return [bar[3], bar[4], bar[1], ends[i]];
+            });
+            const out = Object.assign({}, trace.style);
+            if (model.large) {
+                // null breaks the line between bars
+                out.x = [];
+                out.y = [];
+                out.customdata = [];
+                trace.bars.forEach(function(bar, i) {
+                    out.x.push(bar[1], ends[i], null);
+                    out.y.push(bar[0], bar[0], null);
+                    out.customdata.push(custom[i], custom[i], null);
+                });
+            } else {
+                out.y = trace.bars.map(function(bar) { return bar[0]; });
+                out.base = trace.bars.map(function(bar) { return bar[1]; });
+                out.x = trace.bars.map(function(bar, i) {
+                    return bar[1] === null || ends[i] === null ? null : Date.parse(ends[i]) - Date.parse(bar[1]);
+                });
+                out.customdata = custom;
+            }
+            data.push(out);
+        });
+        const layout = Object.assign({}, model.layout, {
+            // "Today" line
+            shapes: [{
+                type: 'line', x0: today, x1: today, y0: 0, y1: 1,
+                xref: 'x', yref: 'paper', line: {dash: 'dot', color: 'black'}
+            }],
+            annotations: [{x: today, y: 1.02, text: 'Today', showarrow: false, xref: 'x', yref: 'paper'}]
+        });
+        return {data: data, layout: layout};
+    }
+    """,
+    Output('milestone-gantt-chart', 'figure'),
+    Input('gantt-data', 'data')
+)
+
+# Opening the modal is handled in the browser from the activity store
+app.clientside_callback(
+    """
+    function(clickData, store) {
+        const noUpdate = window.dash_clientside.no_update;
+        if (!clickData) {
+            return [false, noUpdate, noUpdate, noUpdate];
+        }
+        const milestoneId = clickData.points[0].customdata[0];
+        const key = String(milestoneId).trim();
+        const rows = (store && store.index[key]) || [];
+        const columns = (store && store.columns) || [];
+        return [true, "Activities for " + milestoneId, rows, columns];
+    }
+    """,
     Output('activity-modal', 'is_open'),
     Output('modal-title', 'children'),
     Output('activities-table', 'data'),
     Output('activities-table', 'columns'),
     Input('milestone-gantt-chart', 'clickData'),
-    State('activity-modal', 'is_open')
+    State('activity-store', 'data')
 )
-def show_activities(clickData, is_open):
-    if clickData:
-        milestone_id = clickData['points'][0]['customdata'][0]
-        _, df_activities, _ = fetch_data()
-        df = df_activities[df_activities['Mielstone ID'] == milestone_id]
-        data = df.to_dict('records')
-        columns = [{"name": i, "id": i} for i in df.columns]
-        return True, f"Activities for {milestone_id}", data, columns
-    return False, dash.no_update, dash.no_update, dash.no_update
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
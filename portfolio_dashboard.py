@@ -0,0 +1,109 @@
+import os
+
+import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
+from dash import dcc, html, dash_table, Input, Output
+
+import metrics
+import workbook_data
+
+PORTFOLIO_TABS = ("Milestones", "Risk_Register", "Issue_Tracker")
+PORTFOLIO_COLUMNS = ["Project", "Milestones", "Avg Progress", "Overdue", "Risks", "High Risks",
+                     "Open Issues", "Data Age"]
+# Seconds a render waits for project loads; slower projects show as loading
+PORTFOLIO_WAIT = float(os.environ.get("PORTFOLIO_WAIT_SECONDS", 3))
+# How often the page checks again while some projects are still loading
+PORTFOLIO_PENDING_POLL_MS = int(os.environ.get("PORTFOLIO_PENDING_POLL_MS", 2000))
+
+def project_href(project, page=""):
+    # The default project keeps the unprefixed URLs
+    prefix = "" if project == workbook_data.DEFAULT_PROJECT else project
+    return "/" + "/".join(part for part in (prefix, page) if part)
+
+# Per-project counts, recomputed only when one of the project's tabs changes.
+# End dates of unfinished milestones are kept sorted so the overdue count
+# for any day is a binary search.
+def _build_summary(df_milestones, df_risks, df_issues):
+    progress = df_milestones['Overall Progress']
+    levels = df_risks['Risk Level'].astype(str).str.strip().str.lower()
+    issue_status = df_issues['Status'].astype(str).str.strip().str.lower()
+    return {
+        "milestones": len(df_milestones),
+        "progress": float(progress.mean()) if len(progress) else 0.0,
+        "open_ends": np.sort(df_milestones.loc[progress < 1, 'End Date'].dropna().to_numpy()),
+        "risks": len(df_risks),
+        "high_risks": int((levels == 'high').sum()),
+        "open_issues": int((issue_status == 'open').sum()),
+    }
+
+def project_summary(project, today):
+    summary = workbook_data.derived('portfolio_summary', PORTFOLIO_TABS, _build_summary, project=project)
+    age = workbook_data.snapshot_age(project)
+    return {
+        "Project": f"[{project}]({project_href(project, 'dashboard')})",
+        "Milestones": summary["milestones"],
+        "Avg Progress": f"{summary['progress']:.0%}",
+        "Overdue": int(np.searchsorted(summary["open_ends"], today.to_datetime64(), side='right')),
+        "Risks": summary["risks"],
+        "High Risks": summary["high_risks"],
+        "Open Issues": summary["open_issues"],
+        "Data Age": "" if age is None else f"{age:.0f}s",
+    }
+
+def portfolio_rows():
+    # Every project's workbook is loaded at once, so the page waits about as
+    # long as the slowest project rather than the sum of them, and at most
+    # PORTFOLIO_WAIT; projects still loading then finish in the background.
+    # Returns (rows, number of projects still loading).
+    today = pd.Timestamp.today().normalize()
+    results = workbook_data.map_projects(lambda project: project_summary(project, today), timeout=PORTFOLIO_WAIT)
+    rows, pending = [], 0
+    for project, result in results.items():
+        if isinstance(result, workbook_data.LoadPending):
+            pending += 1
+            result = {"Project": project, "Milestones": "loading…"}
+        elif isinstance(result, Exception):
+            result = {"Project": project, "Milestones": "unavailable"}
+        rows.append(result)
+    return rows, pending
+
+def _header(rows, pending):
+    return f"{len(rows)} projects" + (f", {pending} loading" if pending else "")
+
+@metrics.instrument_callback("portfolio_dashboard")
+def portfolio_dashboard():
+    rows, pending = portfolio_rows()
+    table = dash_table.DataTable(
+        id="portfolio-table",
+        columns=[{"name": c, "id": c, "presentation": "markdown"} if c == "Project" else {"name": c, "id": c}
+                 for c in PORTFOLIO_COLUMNS],
+        data=rows,
+        sort_action="native",
+        style_cell={"textAlign": "left", "padding": "5px"},
+        style_header={"backgroundColor": "#E6E6E6", "fontWeight": "bold"}
+    )
+
+    return dbc.Container([
+        html.H2("Portfolio Overview", className="text-center my-4"),
+        # Runs only while some projects are still loading
+        dcc.Interval(id="portfolio-refresh", interval=PORTFOLIO_PENDING_POLL_MS, disabled=not pending),
+        dbc.Card([
+            dbc.CardHeader(_header(rows, pending), id="portfolio-header"),
+            dbc.CardBody(table)
+        ], className="shadow-sm")
+    ], fluid=True)
+
+def register_portfolio_callbacks(app):
+    @app.callback(
+        Output("portfolio-table", "data"),
+        Output("portfolio-header", "children"),
+        Output("portfolio-refresh", "disabled"),
+        Input("portfolio-refresh", "n_intervals"),
+        Input("live-versions", "data"),
+        prevent_initial_call=True
+    )
+    @metrics.instrument_callback("update_portfolio")
+    def update_portfolio(n, live_versions):
+        rows, pending = portfolio_rows()
+        return rows, _header(rows, pending), not pending
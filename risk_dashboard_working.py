@@ -1,60 +1,67 @@
 
+import functools
+
 import dash
-from dash import dcc, html, Input, Output, dash_table
+from dash import dcc, html, Input, Output, State, dash_table
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.graph_objects as go
-import gspread
-from gspread_dataframe import get_as_dataframe
-from oauth2client.service_account import ServiceAccountCredentials
 import os
 
-app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
-server = app.server
+import history_store
+import metrics
+import workbook_data
+from table_paging import page_frame
 
-# --- Layouts ---
-home_layout = html.Div([
-    html.H1("Welcome to AIS Portal", className="text-center my-4"),
-    dbc.Row([
-        dbc.Col(dcc.Link(dbc.Button("📊 Dashboard", color="primary", className="btn-lg w-100"), href="/dashboard"), width=6),
-        dbc.Col(dcc.Link(dbc.Button("🛡️ Risk View", color="danger", className="btn-lg w-100"), href="/risks"), width=6),
-    ], className="my-4 text-center", justify="center")
-])
+RISK_TABLE_COLUMNS = ["Risk ID", "Risk Description", "Likelihood (1-5)", "Impact (1-5)", "Risk Level", "Status"]
+RISK_PAGE_SIZE = int(os.environ.get("RISK_PAGE_SIZE", 25))
 
-app.layout = html.Div([
-    dcc.Location(id="url", refresh=False),
-    html.Div(id="page-content")
-])
+# Summary counts and matrix cells, computed once per Risk_Register version
+def _build_risk_aggregates(df_risks):
+    levels = df_risks['Risk Level'].astype(str).str.strip().str.lower().value_counts()
+    score_counts = {level: int(levels.get(level.lower(), 0)) for level in ("High", "Medium", "Low")}
 
-@app.callback(Output("page-content", "children"), Input("url", "pathname"))
-def display_page(pathname):
-    if pathname == "/dashboard":
-        return html.Div("DASHBOARD PLACEHOLDER")
-    elif pathname == "/risks":
-        return risk_dashboard()
-    else:
-        return home_layout
-
-def risk_dashboard():
-    # GSheet load
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_name('credentials.json', scope)
-    client = gspread.authorize(creds)
-    sheet = client.open("Project_Planning_Workbook")
-    values = sheet.worksheet("Risk_Register").get_all_values()
-    headers = values[0]
-    rows = values[1:]
-    df_risks = pd.DataFrame(rows, columns=headers)
-
-    df_risks['Likelihood (1-5)'] = pd.to_numeric(df_risks['Likelihood (1-5)'], errors='coerce')
-    df_risks['Impact (1-5)'] = pd.to_numeric(df_risks['Impact (1-5)'], errors='coerce')
-    
-    score_counts = {
-        "High": df_risks[df_risks['Risk Level'].astype(str).str.strip().str.lower() == 'high'].shape[0],
-        "Medium": df_risks[df_risks['Risk Level'].astype(str).str.strip().str.lower() == 'medium'].shape[0],
-        "Low": df_risks[df_risks['Risk Level'].astype(str).str.strip().str.lower() == 'low'].shape[0],
+    # Risk IDs per (likelihood, impact) cell
+    matrix_df = df_risks[['Risk ID', 'Likelihood (1-5)', 'Impact (1-5)', 'Risk Score']].dropna()
+    cells = matrix_df['Risk ID'].astype(str).groupby(
+        [matrix_df['Likelihood (1-5)'].astype(int), matrix_df['Impact (1-5)'].astype(int)], sort=False
+    ).agg(", ".join)
+
+    return {
+        "score_counts": score_counts,
+        "matrix_cells": cells.to_dict(),
     }
 
+def risk_aggregates(project=None):
+    return workbook_data.derived('risk_aggregates', ("Risk_Register",), _build_risk_aggregates, project=project)
+
+# Daily open risks per level from the history store, rebuilt when the
+# Risk_Register history gains a version or the day changes
+@functools.lru_cache(maxsize=16)
+def _risk_trend_figure(project, recorded_at, day):
+    with metrics.phase("history"):
+        trend = history_store.risk_trend(project)
+    fig = go.Figure()
+    for level, color in (("High", "red"), ("Medium", "orange"), ("Low", "gold")):
+        fig.add_trace(go.Scatter(x=trend["time"], y=trend[level], mode="lines", name=level,
+                                 line={"color": color}, stackgroup="risks"))
+    fig.update_layout(height=300, margin={"l": 40, "r": 20, "t": 20, "b": 40},
+                      yaxis_title="Open risks", legend={"orientation": "h", "y": -0.2})
+    # Kept as a plain dict so repeat renders skip plotly's validation and conversion
+    return fig.to_dict()
+
+def risk_trend_figure(project=None):
+    project = project or workbook_data.DEFAULT_PROJECT
+    recorded_at = history_store.last_recorded(project, "Risk_Register")
+    return _risk_trend_figure(project, recorded_at, pd.Timestamp.today().date())
+
+@metrics.instrument_callback("risk_dashboard")
+def risk_dashboard(project=None):
+    # Assemble from aggregates cached next to the Risk_Register frame
+    aggregates = risk_aggregates(project)
+    score_counts = aggregates["score_counts"]
+    matrix_cells = aggregates["matrix_cells"]
+
 
     summary_block = dbc.Card([
         dbc.CardHeader("Open Risks by Severity"),
@@ -77,17 +84,11 @@ def risk_dashboard():
     ])
 
     # --- New Risk Matrix ---
-    matrix_df = df_risks[['Risk ID', 'Likelihood (1-5)', 'Impact (1-5)', 'Risk Score']].dropna()
-    matrix_cells = {}
-    for _, row in matrix_df.iterrows():
-        key = (int(row['Likelihood (1-5)']), int(row['Impact (1-5)']))
-        matrix_cells.setdefault(key, []).append(str(row['Risk ID']))
-
     matrix_grid = []
     for impact in range(5, 0, -1):
         row = []
         for likelihood in range(1, 6):
-            risk_ids = matrix_cells.get((likelihood, impact), [])
+            risk_ids = matrix_cells.get((likelihood, impact), "")
             score = impact * likelihood
             if score >= 11:
                 color = "red"
@@ -95,7 +96,7 @@ def risk_dashboard():
                 color = "orange"
             else:
                 color = "yellow"
-            cell_content = html.Div(", ".join(risk_ids), style={"fontSize": "0.75rem"})
+            cell_content = html.Div(risk_ids, style={"fontSize": "0.75rem"})
             row.append(html.Td(cell_content, style={"backgroundColor": color, "border": "1px solid #ccc", "width": "80px", "height": "80px", "textAlign": "center", "verticalAlign": "middle", "fontSize": "0.65rem", "whiteSpace": "normal", "wordWrap": "break-word", "overflow": "hidden"}))
         matrix_grid.append(html.Tr(row))
 
@@ -106,11 +107,20 @@ def risk_dashboard():
         ])
     ])
 
+    trend_block = dbc.Card([
+        dbc.CardHeader(f"Open Risks Trend (last {history_store.HISTORY_DAYS} days)"),
+        dbc.CardBody(dcc.Graph(figure=risk_trend_figure(project)))
+    ])
+
     # --- Risk Table (Bottom) ---
-    table_columns = ["Risk ID", "Risk Description", "Likelihood (1-5)", "Impact (1-5)", "Risk Level", "Status"]
     risk_table = dash_table.DataTable(
-        columns=[{"name": i, "id": i} for i in table_columns],
-        data=df_risks[table_columns].to_dict('records'),
+        id="risk-table",
+        columns=[{"name": i, "id": i} for i in RISK_TABLE_COLUMNS],
+        data=[],
+        # Paging, sorting and filtering run on the server against the cached frame
+        page_action="custom", page_current=0, page_size=RISK_PAGE_SIZE,
+        sort_action="custom", sort_mode="multi", sort_by=[],
+        filter_action="custom", filter_query="",
         style_table={"maxHeight": "300px", "overflowY": "auto"},
         style_cell={"textAlign": "left", "padding": "5px"},
         style_header={"backgroundColor": "rgb(230, 230, 230)", "fontWeight": "bold"}
@@ -122,6 +132,9 @@ def risk_dashboard():
             dbc.Col(summary_block, width=6),
             dbc.Col(matrix_table, width=6)
         ], className="mb-4"),
+        dbc.Row([
+            dbc.Col(trend_block)
+        ], className="mb-4"),
         dbc.Row([
             dbc.Col([
                 html.H5("Open Risks Table", className="mb-3"),
@@ -130,7 +143,58 @@ def risk_dashboard():
         ])
     ], fluid=True)
 
+def _risk_table_frame(df_risks):
+    return df_risks[RISK_TABLE_COLUMNS]
+
+def register_risk_callbacks(app):
+    @app.callback(
+        Output("risk-table", "data"),
+        Output("risk-table", "page_count"),
+        Input("risk-table", "page_current"),
+        Input("risk-table", "page_size"),
+        Input("risk-table", "sort_by"),
+        Input("risk-table", "filter_query"),
+        Input("live-version", "data"),
+        State("project", "data")
+    )
+    @metrics.instrument_callback("update_risk_table")
+    def update_risk_table(page_current, page_size, sort_by, filter_query, live_version, project):
+        df = workbook_data.derived('risk_table', ("Risk_Register",), _risk_table_frame, project=project)
+        return page_frame(df, RISK_TABLE_COLUMNS, page_current, page_size, sort_by, filter_query)
+
+# --- Standalone app ---
+# Built only when this file is run directly; app.py serves risk_dashboard() itself
+home_layout = html.Div([
+    html.H1("Welcome to AIS Portal", className="text-center my-4"),
+    dbc.Row([
+        dbc.Col(dcc.Link(dbc.Button("📊 Dashboard", color="primary", className="btn-lg w-100"), href="/dashboard"), width=6),
+        dbc.Col(dcc.Link(dbc.Button("🛡️ Risk View", color="danger", className="btn-lg w-100"), href="/risks"), width=6),
+    ], className="my-4 text-center", justify="center")
+])
+
+def create_app():
+    app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
+
+    app.layout = html.Div([
+        dcc.Location(id="url", refresh=False),
+        dcc.Store(id="live-version"),
+        dcc.Store(id="project"),
+        html.Div(id="page-content")
+    ])
+
+    @app.callback(Output("page-content", "children"), Input("url", "pathname"))
+    def display_page(pathname):
+        if pathname == "/dashboard":
+            return html.Div("DASHBOARD PLACEHOLDER")
+        elif pathname == "/risks":
+            return risk_dashboard()
+        else:
+            return home_layout
+
+    register_risk_callbacks(app)
+    return app
+
 # Run
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    create_app().run(host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,136 @@
+# Production entry point: serves app.server with waitress across several
+# worker processes sharing one listening socket.
+#
+# The parent process is the only one talking to the workbook backend. It
+# keeps every project loaded and its refreshers publish each new load to a
+# per-project snapshot file; workers follow those files (a local stat per
+# tick) instead of each polling Google Sheets, caching only the projects they
+# serve within the memory budget. The parent also flushes the issue queues
+# and records the change history.
+#
+# Memory: numeric and date columns are mapped from the snapshot's column
+# file, so all workers share one copy of them. Repetitive text columns are
+# dictionary encoded, so a worker holds only their distinct values plus a
+# reference per row. Mostly distinct text (IDs, descriptions) cannot be
+# shared without pyarrow; each worker holds its own, up to
+# WORKBOOK_CACHE_MAX_MB.
+#
+#   WEB_WORKERS=4 WEB_THREADS=8 python serve.py
+
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8050))
+WORKERS = int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1))
+THREADS = int(os.environ.get("WEB_THREADS", 8))
+# How often workers check the shared snapshot file for a new version
+SNAPSHOT_POLL_INTERVAL = float(os.environ.get("SNAPSHOT_POLL_INTERVAL", 2))
+
+logger = logging.getLogger("serve")
+
+
+def _listen():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(1024)
+    return sock
+
+
+def _run_worker(sock):
+    import waitress
+
+    import history_store
+    import issue_queue
+    import workbook_data
+    from workbook_backends import SnapshotBackend
+
+    # Serve from the parent's snapshots, and leave issue flushing and history
+    # recording to the parent. The new registry drops the parent's listeners;
+    # RECORD_IN_PROCESS keeps importing app from adding the recorder back.
+    workbook_data.use_factory(lambda project: workbook_data.WorkbookCache(
+        SnapshotBackend(workbook_data.snapshot_path(project)),
+        ttl=SNAPSHOT_POLL_INTERVAL, refresh_interval=SNAPSHOT_POLL_INTERVAL
+    ))
+    issue_queue.FLUSH_IN_PROCESS = False
+    history_store.RECORD_IN_PROCESS = False
+
+    import live_updates
+    from app import server
+    # Live update streams each hold a thread, on top of the request threads
+    waitress.serve(server, sockets=[sock], threads=THREADS + live_updates.MAX_STREAMS, ident="ais-portal")
+
+
+def _spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            _run_worker(sock)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    if WORKERS <= 1 or not hasattr(os, "fork"):
+        # Single process: threads only, refresher and flusher in-process
+        import waitress
+        import live_updates
+        from app import server
+        waitress.serve(server, host=HOST, port=PORT, threads=THREADS + live_updates.MAX_STREAMS)
+        return
+
+    import history_store
+    import issue_queue
+    import workbook_data
+
+    # The parent owns the backend and publishes every project, so it keeps them all;
+    # load them concurrently before forking
+    workbook_data.use_factory(workbook_data.make_cache, max_bytes=None)
+    # Only on the parent's registry; workers build their own
+    workbook_data.publish_snapshots()
+    history_store.start_recording()
+    for project, result in workbook_data.load_projects().items():
+        if isinstance(result, Exception):
+            logger.error("Initial load of project %s failed; workers will wait for the refresher", project)
+    workbook_data.shutdown_loader()
+
+    # Fork before starting the parent's threads so workers inherit no held locks
+    sock = _listen()
+    workers = {_spawn(sock) for _ in range(WORKERS)}
+    workbook_data.start_refresher()
+    issue_queue.start_flusher()
+    logger.info("Serving on %s:%d with %d workers x %d threads", HOST, PORT, WORKERS, THREADS)
+
+    def shutdown(signum, frame):
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Replace workers that exit unexpectedly
+    while True:
+        pid, status = os.wait()
+        if pid in workers:
+            workers.discard(pid)
+            logger.warning("Worker %d exited with status %d; restarting", pid, status)
+            time.sleep(1)
+            workers.add(_spawn(sock))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Server-side paging, sorting and filtering for DataTables with
+# page_action/sort_action/filter_action set to 'custom'. Tables send only the
+# visible page of the displayed columns, whatever the size of the cached frame.
+
+import math
+import operator
+import re
+
+import pandas as pd
+
+COMPARISONS = {
+    'ge': operator.ge, 'le': operator.le, 'lt': operator.lt,
+    'gt': operator.gt, 'ne': operator.ne, 'eq': operator.eq,
+}
+# Operator token as written in filter_query -> operator name
+OPERATORS = {
+    'ge': 'ge', '>=': 'ge', 'le': 'le', '<=': 'le', 'lt': 'lt', '<': 'lt',
+    'gt': 'gt', '>': 'gt', 'ne': 'ne', '!=': 'ne', 'eq': 'eq', '=': 'eq',
+    'contains': 'contains', 'datestartswith': 'datestartswith',
+}
+# "{column} op value": the operator is the token right after the column name,
+# so operator words inside the value ("orange juice") are left alone
+FILTER_PART = re.compile(r"\s*\{(.+?)\}\s*(\S+)\s*(.*)", re.DOTALL)
+
+
+def split_filter_part(filter_part):
+    # Parses one "{column} op value" clause of a DataTable filter_query
+    match = FILTER_PART.match(filter_part)
+    if not match:
+        return None, None, None
+    name, token, value_part = match.group(1), match.group(2), match.group(3).strip()
+    if token not in OPERATORS and token[:1] in ('i', 's'):
+        # Case-insensitive/-sensitive variants ("icontains", "s="); matching follows the operator
+        token = token[1:]
+    if token not in OPERATORS:
+        return None, None, None
+    op = OPERATORS[token]
+    v0 = value_part[0] if value_part else ''
+    if v0 and len(value_part) > 1 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+        value = value_part[1: -1].replace('\\' + v0, v0)
+    elif op in ('contains', 'datestartswith'):
+        # Text operators keep the typed value as-is ("00" is not 0.0)
+        value = value_part
+    else:
+        try:
+            value = float(value_part)
+        except ValueError:
+            value = value_part
+    return name, op, value
+
+
+def _apply_filter(df, filter_query):
+    for part in (filter_query or '').split(' && '):
+        col, op, value = split_filter_part(part)
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if op in COMPARISONS:
+            try:
+                mask = COMPARISONS[op](series, value)
+            except TypeError:
+                # Mixed-type column: compare numerically where possible, else as text
+                if isinstance(value, float):
+                    mask = COMPARISONS[op](pd.to_numeric(series, errors='coerce'), value)
+                else:
+                    mask = COMPARISONS[op](series.astype(str), str(value))
+        elif op == 'contains':
+            mask = series.astype(str).str.contains(str(value), case=False, regex=False)
+        else:
+            mask = series.astype(str).str.startswith(str(value))
+        df = df[mask.fillna(False)]
+    return df
+
+
+def _as_text(series):
+    # Sort key for mixed-type object columns; blanks stay missing so they sort last
+    if series.dtype != object:
+        return series
+    return series.where(series.isna(), series.astype(str))
+
+
+def _sort(df, sort_by):
+    by = [s['column_id'] for s in sort_by]
+    ascending = [s['direction'] == 'asc' for s in sort_by]
+    try:
+        return df.sort_values(by, ascending=ascending, na_position='last', kind='stable')
+    except TypeError:
+        # Mixed-type column (e.g. IDs read from a workbook file): sort as text
+        return df.sort_values(by, ascending=ascending, na_position='last', kind='stable', key=_as_text)
+
+
+def page_frame(df, columns, page_current, page_size, sort_by, filter_query):
+    # Returns (records for the requested page, page_count)
+    df = _apply_filter(df[columns], filter_query)
+    if sort_by:
+        df = _sort(df, sort_by)
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page = min(page_current or 0, page_count - 1)
+    start = page * page_size
+    return df.iloc[start: start + page_size].to_dict('records'), page_count
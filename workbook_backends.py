@@ -0,0 +1,492 @@
+# Storage backends for the workbook data layer.
+# Each backend turns a list of tab names into typed DataFrames, reports a cheap
+# revision, and knows how to append rows to a tab. workbook_data picks one via
+# WORKBOOK_BACKEND.
+
+import contextlib
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+CREDENTIALS_FILE = os.environ.get("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+
+# Client-side budget for Sheets/Drive requests, kept under Google's per-minute quota
+SHEETS_REQUESTS_PER_MINUTE = float(os.environ.get("SHEETS_REQUESTS_PER_MINUTE", 60))
+SHEETS_BURST = int(os.environ.get("SHEETS_BURST", 10))
+# Longest a request queues for budget before failing so the cache serves stale data instead
+SHEETS_MAX_WAIT = float(os.environ.get("SHEETS_MAX_WAIT", 5))
+# Retries for 429 and 5xx responses, with exponential backoff and jitter
+SHEETS_MAX_RETRIES = int(os.environ.get("SHEETS_MAX_RETRIES", 4))
+SHEETS_BACKOFF_BASE = float(os.environ.get("SHEETS_BACKOFF_BASE", 1))
+SHEETS_BACKOFF_MAX = float(os.environ.get("SHEETS_BACKOFF_MAX", 32))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Writes are not idempotent: a 5xx may come back after Google applied the
+# append, so they are only retried when the request was refused outright
+WRITE_METHODS = {"append_rows"}
+WRITE_RETRY_STATUSES = {429}
+
+logger = logging.getLogger(__name__)
+
+# Typed columns parsed once per load so callbacks get ready-to-use frames
+COLUMN_TYPES = {
+    "Milestones": {"Start Date": "date", "End Date": "date", "Overall Progress": "progress"},
+    "Activities": {"Progress": "progress"},
+    "Risk_Register": {"Likelihood (1-5)": "number", "Impact (1-5)": "number"},
+}
+
+# Header variants renamed to their canonical spelling on load
+COLUMN_ALIASES = {
+    "Activities": {"Mielstone ID": "Milestone ID"},
+}
+
+# Columns the pages index directly; added empty when a tab or header is missing
+REQUIRED_COLUMNS = {
+    "Milestones": ["Milestone ID", "Milestone Name", "Start Date", "End Date", "Overall Progress"],
+    "Activities": ["Milestone ID", "Assigned To", "Progress"],
+    "References": ["Person Name", "Role"],
+    "Risk_Register": ["Risk ID", "Risk Description", "Likelihood (1-5)", "Impact (1-5)",
+                      "Risk Score", "Risk Level", "Status"],
+    "Issue_Tracker": ["Issue ID", "Issue Description", "Severity", "Reported By",
+                      "Date Reported", "Status"],
+}
+
+
+def frame_from_values(values):
+    if not values:
+        return pd.DataFrame()
+    headers = values[0]
+    width = len(headers)
+    # The API trims trailing empty cells, so pad every row to the header width
+    rows = [row[:width] + [''] * (width - len(row)) for row in values[1:]]
+    df = pd.DataFrame(rows, columns=headers)
+    return df.replace('', np.nan).dropna(how='all')
+
+
+def parse_types(tab, df):
+    aliases = {k: v for k, v in COLUMN_ALIASES.get(tab, {}).items() if v not in df.columns}
+    if aliases:
+        df = df.rename(columns=aliases)
+    for col in REQUIRED_COLUMNS.get(tab, []):
+        if col not in df.columns:
+            df[col] = np.nan
+    for col, kind in COLUMN_TYPES.get(tab, {}).items():
+        if kind == "date":
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif kind == "progress":
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def frame_token(df):
+    # Cheap content hash used to tell whether a tab changed between loads
+    digest = hashlib.sha1(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+# --- Google Sheets ---
+class QuotaExhausted(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    # Requests take a token each; tokens refill at rate_per_minute up to burst.
+    # A caller reserves its token up front, so waiters are served in order.
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait):
+        # Returns the seconds spent waiting; raises QuotaExhausted past max_wait
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                raise QuotaExhausted(f"Sheets request budget exhausted for the next {wait:.1f}s")
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def widen(self, burst):
+        # Raise the burst (never lower it), with the extra tokens available now
+        with self._lock:
+            if burst > self.capacity:
+                self._tokens += burst - self.capacity
+                self.capacity = float(burst)
+
+    def drain(self):
+        # Google said no: stop spending until the bucket refills
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+
+
+# Quota belongs to the service account, so every SheetsBackend shares one budget
+sheets_limiter = TokenBucket(SHEETS_REQUESTS_PER_MINUTE, SHEETS_BURST)
+
+
+_quota_wait = threading.local()
+
+
+@contextlib.contextmanager
+def quota_wait(seconds):
+    # Lets Sheets requests made by this thread queue up to seconds for budget,
+    # e.g. bulk loads that run off the request path
+    previous = getattr(_quota_wait, "seconds", None)
+    _quota_wait.seconds = seconds
+    try:
+        yield
+    finally:
+        _quota_wait.seconds = previous
+
+
+def _max_wait():
+    seconds = getattr(_quota_wait, "seconds", None)
+    return SHEETS_MAX_WAIT if seconds is None else seconds
+
+
+def _error_status(exc):
+    # gspread's APIError keeps the HTTP response
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_delay(exc, attempt):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        delay = min(SHEETS_BACKOFF_MAX, SHEETS_BACKOFF_BASE * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Imported here: the auth stack is slow to import and only the Sheets backend needs it
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+
+            creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPES)
+            _client = gspread.authorize(creds)
+        return _client
+
+
+def set_client(client):
+    # Inject a client, e.g. the in-process fake used by the benchmarks
+    global _client
+    with _client_lock:
+        _client = client
+
+
+class SheetsBackend:
+    def __init__(self, workbook_name, limiter=None):
+        self.workbook_name = workbook_name
+        self.limiter = limiter or sheets_limiter
+        self._book = None
+        self._worksheets = {}
+        self._lock = threading.RLock()
+
+    def _open(self):
+        if self._book is None:
+            self._book = get_client().open(self.workbook_name)
+        return self._book
+
+    def _reset(self):
+        # Drop the handles so the next attempt re-opens the workbook
+        self._book = None
+        self._worksheets.clear()
+
+    def _call(self, method, func, *args, **kwargs):
+        # Every Sheets/Drive request goes through here so it is counted, kept
+        # within the request budget, and retried on quota and server errors
+        # (quota errors only, for writes)
+        retry_statuses = WRITE_RETRY_STATUSES if method in WRITE_METHODS else RETRY_STATUSES
+        for attempt in range(SHEETS_MAX_RETRIES + 1):
+            waited = self.limiter.acquire(_max_wait())
+            if waited:
+                metrics.observe("sheets_rate_limit_wait_seconds", waited)
+            metrics.inc("sheets_api_calls_total", method=method)
+            try:
+                with metrics.phase("sheets_io"):
+                    return func(*args, **kwargs)
+            except Exception as exc:
+                metrics.inc("sheets_api_errors_total", method=method)
+                status = _error_status(exc)
+                if status not in retry_statuses or attempt == SHEETS_MAX_RETRIES:
+                    self._reset()
+                    raise
+                if status == 429:
+                    self.limiter.drain()
+                delay = _retry_delay(exc, attempt)
+                metrics.inc("sheets_api_retries_total", method=method)
+                logger.warning("Sheets %s returned %s; retrying in %.1fs", method, status, delay)
+                time.sleep(delay)
+
+    def _worksheet(self, tab):
+        if tab not in self._worksheets:
+            self._worksheets[tab] = self._call("worksheet", lambda: self._open().worksheet(tab))
+        return self._worksheets[tab]
+
+    def revision(self):
+        # Drive's modified time is one small request, far cheaper than the values
+        with self._lock:
+            try:
+                return self._call("get_lastUpdateTime", lambda: self._open().get_lastUpdateTime())
+            except QuotaExhausted:
+                # No budget for the check means none for the full load either
+                raise
+            except Exception:
+                return None
+
+    def load(self, tabs):
+        # One batched values request for every tab instead of a read per worksheet
+        ranges = [f"'{tab}'" for tab in tabs]
+        with self._lock:
+            response = self._call("values_batch_get", lambda: self._open().values_batch_get(ranges))
+        value_ranges = response.get('valueRanges', [])
+        with metrics.phase("parse"):
+            return {
+                tab: parse_types(tab, frame_from_values(value_range.get('values', [])))
+                for tab, value_range in zip(tabs, value_ranges)
+            }
+
+    def append_rows(self, tab, rows):
+        with self._lock:
+            worksheet = self._worksheet(tab)
+            self._call("append_rows", worksheet.append_rows, rows, value_input_option="USER_ENTERED")
+
+
+# --- Snapshot files ---
+def write_snapshot(path, frames):
+    # Write to a temp file and rename so readers never see a partial snapshot
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(frames, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    with metrics.phase("snapshot_io"), open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# --- Shared snapshots ---
+# Frames published for serving workers (see serve.py). Numeric, boolean and
+# date columns go into one flat .columns file that readers map read-only, so
+# however many workers follow it the OS keeps one copy of those buffers.
+# Text columns with repeated values (status, owner, phase...) are dictionary
+# encoded: their integer codes go into the same file and only the distinct
+# values are pickled, so a reader holds one string per distinct value and a
+# reference per row instead of a string per cell. Mostly distinct text
+# (IDs, descriptions) is pickled as is, and every reader holds its own copy.
+SHARED_KINDS = "biufcmM"
+SHARED_ALIGN = 64
+# Text columns are encoded when at most this share of their values is distinct
+SHARED_MAX_DISTINCT = 0.5
+# Column files kept per snapshot, so a reader that just read the header can still open its file
+SHARED_KEEP = 2
+
+
+def _shareable(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in SHARED_KINDS
+
+
+def _encodable(series):
+    if not isinstance(series.dtype, pd.StringDtype) or not len(series):
+        return None
+    codes, uniques = pd.factorize(series.array)
+    if len(uniques) > len(series) * SHARED_MAX_DISTINCT:
+        return None
+    return codes.astype(np.min_scalar_type(-max(len(uniques), 1))), uniques
+
+
+def _column_files(path):
+    def written(name):
+        try:
+            return os.stat(name).st_mtime_ns
+        except OSError:
+            return 0
+    return sorted(glob.glob(f"{glob.escape(path)}.*.columns"), key=written)
+
+
+def write_shared_snapshot(path, frames):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data_path = f"{path}.{time.time_ns()}.{os.getpid()}.columns"
+    offset = 0
+    layout = {}
+    with open(data_path, 'wb') as data:
+        def put(values):
+            # ("shared", offset, dtype, length) of values appended to the column file
+            nonlocal offset
+            pad = -offset % SHARED_ALIGN
+            data.write(b"\0" * pad)
+            offset += pad
+            values = np.ascontiguousarray(values)
+            data.write(values.tobytes())
+            spec = ("shared", offset, values.dtype.str, len(values))
+            offset += values.nbytes
+            return spec
+
+        def pack(series):
+            if _shareable(series.dtype):
+                return put(series.to_numpy())
+            encoded = _encodable(series)
+            if encoded is not None:
+                codes, uniques = encoded
+                return ("coded", put(codes), uniques)
+            return ("pickled", series.array)
+
+        for tab, df in frames.items():
+            index = df.index
+            if _shareable(index.dtype) and not isinstance(index, pd.RangeIndex):
+                index = put(index.to_numpy())
+            layout[tab] = {
+                "columns": df.columns,
+                "index": index,
+                "index_name": df.index.name,
+                "arrays": [pack(series) for _, series in df.items()],
+            }
+    write_snapshot(path, {"data": os.path.basename(data_path), "size": offset, "frames": layout})
+    for stale in _column_files(path)[:-SHARED_KEEP]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def read_shared_snapshot(path):
+    header = read_snapshot(path)
+    data_path = os.path.join(os.path.dirname(path), header["data"])
+    # A plain view of the mapping; the arrays sliced from it keep it open
+    buffer = np.asarray(np.memmap(data_path, mode='r')) if header["size"] else np.empty(0, np.uint8)
+
+    def get(spec):
+        if spec[0] == "pickled":
+            return spec[1]
+        if spec[0] == "coded":
+            # Code -1 marks a missing value
+            return spec[2].take(get(spec[1]).astype(np.intp), allow_fill=True)
+        _, offset, dtype, length = spec
+        dtype = np.dtype(dtype)
+        return buffer[offset:offset + length * dtype.itemsize].view(dtype)
+
+    frames = {}
+    for tab, entry in header["frames"].items():
+        index = entry["index"]
+        if isinstance(index, tuple):
+            index = pd.Index(get(index), name=entry["index_name"], copy=False)
+        df = pd.DataFrame({i: get(spec) for i, spec in enumerate(entry["arrays"])}, index=index, copy=False)
+        df.columns = entry["columns"]
+        frames[tab] = df
+    return frames
+
+
+class SnapshotBackend:
+    # Read-only backend following a shared snapshot that another process publishes
+    def __init__(self, path):
+        self.path = path
+
+    def revision(self):
+        return os.stat(self.path).st_mtime_ns
+
+    def load(self, tabs):
+        frames = read_shared_snapshot(self.path)
+        return {tab: frames[tab] for tab in tabs}
+
+    def append_rows(self, tab, rows):
+        raise RuntimeError("The snapshot backend is read-only; writes go through the publishing process")
+
+
+# --- Local workbook file ---
+class XlsxBackend:
+    def __init__(self, path, snapshot_dir):
+        self.path = path
+        self.snapshot_dir = snapshot_dir
+        self._mtime = None
+        self._frames = None
+        self._lock = threading.RLock()
+
+    def _snapshot_path(self, mtime):
+        name = os.path.basename(self.path).replace(' ', '_')
+        return os.path.join(self.snapshot_dir, f"{name}.{mtime}.pkl")
+
+    def _parse(self, tabs):
+        with metrics.phase("parse"), pd.ExcelFile(self.path, engine="openpyxl") as book:
+            frames = {}
+            for tab in tabs:
+                if tab in book.sheet_names:
+                    df = book.parse(tab).dropna(how='all')
+                else:
+                    df = pd.DataFrame()
+                frames[tab] = parse_types(tab, df)
+        return frames
+
+    def _write_snapshot(self, mtime, frames):
+        target = self._snapshot_path(mtime)
+        write_snapshot(target, frames)
+        # Older snapshots of this file can never be served again
+        for stale in glob.glob(self._snapshot_path('*')):
+            if stale != target:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def revision(self):
+        return os.stat(self.path).st_mtime_ns
+
+    def load(self, tabs):
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime and self._frames is not None:
+                return dict(self._frames)
+            frames = None
+            snapshot = self._snapshot_path(mtime)
+            if os.path.exists(snapshot):
+                try:
+                    frames = read_snapshot(snapshot)
+                except Exception:
+                    frames = None
+            if frames is None or any(tab not in frames for tab in tabs):
+                frames = self._parse(tabs)
+                self._write_snapshot(mtime, frames)
+            self._mtime = mtime
+            self._frames = frames
+            return dict(frames)
+
+    def append_rows(self, tab, rows):
+        from openpyxl import load_workbook
+
+        with self._lock:
+            book = load_workbook(self.path)
+            ws = book[tab] if tab in book.sheetnames else book.create_sheet(tab)
+            for row in rows:
+                ws.append(row)
+            book.save(self.path)
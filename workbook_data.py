@@ -0,0 +1,518 @@
+# Shared data layer for all dashboard pages.
+# Keeps an in-process cache of the workbook tabs so page renders and
+# callbacks read from memory. The tabs come from a pluggable backend:
+# live Google Sheets (default) or a local workbook file. An optional
+# background refresher keeps the snapshot warm so requests never wait on it.
+# Concurrent loads collapse into one backend fetch, and once a snapshot
+# exists, expired reads are served stale while it is revalidated.
+# Each project has its own workbook and cache; caches are created on first
+# use and the least recently used are dropped past a memory budget.
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+from workbook_backends import (SheetsBackend, SnapshotBackend, XlsxBackend, frame_token, quota_wait,
+                               sheets_limiter, write_shared_snapshot)
+
+WORKBOOK_NAME = os.environ.get("WORKBOOK_NAME", "Project_Planning_Workbook")
+# "sheets" reads the live spreadsheet, "xlsx" reads WORKBOOK_PATH
+WORKBOOK_BACKEND = os.environ.get("WORKBOOK_BACKEND", "sheets")
+WORKBOOK_PATH = os.environ.get("WORKBOOK_PATH", "Project_ Planning_Workbook.xlsx")
+SNAPSHOT_DIR = os.environ.get("WORKBOOK_SNAPSHOT_DIR", ".workbook_cache")
+# "snapshot" reads frames published by another process (see serve.py)
+SHARED_SNAPSHOT_PATH = os.environ.get(
+    "WORKBOOK_SHARED_SNAPSHOT", os.path.join(SNAPSHOT_DIR, "shared_snapshot.pkl")
+)
+# Seconds the cached tabs are served before the backend is asked again
+CACHE_TTL = float(os.environ.get("WORKBOOK_CACHE_TTL", 60))
+# Cadence of the background refresher, when it is running
+REFRESH_INTERVAL = float(os.environ.get("WORKBOOK_REFRESH_INTERVAL", 30))
+# Projects served, as comma-separated "slug=source" pairs; the source is the
+# spreadsheet name, or the file path for the xlsx backend. The first is the
+# default project, served at the unprefixed URLs.
+WORKBOOK_PROJECTS = os.environ.get("WORKBOOK_PROJECTS", "")
+# Memory budget for the frames of all cached projects
+CACHE_MAX_BYTES = int(float(os.environ.get("WORKBOOK_CACHE_MAX_MB", 512)) * 2 ** 20)
+# Workbooks loaded at once when several projects are needed together
+# (0: one per project, at least 8)
+LOAD_WORKERS = int(os.environ.get("WORKBOOK_LOAD_WORKERS", 0))
+# Longest a load started by map_projects queues for Sheets request budget.
+# Longer than a request would wait: callers can stop waiting on the load.
+BULK_QUOTA_WAIT = float(os.environ.get("WORKBOOK_BULK_QUOTA_WAIT", 60))
+# Oldest snapshot readers accept before waiting on a fetch themselves, whether
+# the refresher is running or an expired read is revalidating in the background
+MAX_STALENESS = float(os.environ.get("WORKBOOK_MAX_STALENESS", 600))
+
+logger = logging.getLogger(__name__)
+
+TABS = ("Milestones", "Activities", "References", "Risk_Register", "Issue_Tracker")
+
+# Page names that cannot double as project slugs in URLs
+RESERVED_SLUGS = {"dashboard", "risks", "issues", "portfolio", "assets", "avatars", "events", "metrics"}
+
+
+def parse_projects(spec):
+    # "alpha=Alpha Workbook,beta=Beta Workbook" -> {"alpha": "Alpha Workbook", ...};
+    # a bare slug uses the backend's configured source
+    projects = {}
+    for item in spec.split(","):
+        slug, _, source = item.partition("=")
+        slug = slug.strip()
+        if not slug:
+            continue
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", slug) or slug.lower() in RESERVED_SLUGS:
+            raise ValueError(f"Invalid project slug in WORKBOOK_PROJECTS: {slug!r}")
+        projects[slug] = source.strip() or None
+    return projects
+
+
+PROJECTS = parse_projects(WORKBOOK_PROJECTS) or {"default": None}
+DEFAULT_PROJECT = next(iter(PROJECTS))
+# A cold portfolio view loads every project at once (one request each): let that fit in one burst
+sheets_limiter.widen(len(PROJECTS))
+
+
+def snapshot_path(project=DEFAULT_PROJECT):
+    # File a publishing process writes the project's frames to (see serve.py)
+    if project == DEFAULT_PROJECT:
+        return SHARED_SNAPSHOT_PATH
+    root, ext = os.path.splitext(SHARED_SNAPSHOT_PATH)
+    return f"{root}.{project}{ext}"
+
+
+def make_backend(kind=WORKBOOK_BACKEND, source=None):
+    if kind == "sheets":
+        return SheetsBackend(source or WORKBOOK_NAME)
+    if kind == "xlsx":
+        return XlsxBackend(source or WORKBOOK_PATH, SNAPSHOT_DIR)
+    if kind == "snapshot":
+        return SnapshotBackend(source or SHARED_SNAPSHOT_PATH)
+    raise ValueError(f"Unknown WORKBOOK_BACKEND: {kind!r}")
+
+
+def make_cache(project):
+    source = PROJECTS[project]
+    if source is None and WORKBOOK_BACKEND == "snapshot":
+        source = snapshot_path(project)
+    return WorkbookCache(make_backend(WORKBOOK_BACKEND, source))
+
+
+class WorkbookCache:
+    def __init__(self, backend, tabs=TABS, ttl=CACHE_TTL, max_staleness=MAX_STALENESS,
+                 refresh_interval=REFRESH_INTERVAL):
+        self.backend = backend
+        self.tabs = tuple(tabs)
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self.refresh_interval = refresh_interval
+        self._frames = {}
+        self._tokens = {}
+        self._nbytes = 0
+        self._derived = {}  # key -> (tab tokens, value)
+        self._revision = None
+        self._loaded_at = None   # last successful check against the backend
+        self._checked_at = None  # last attempt, successful or not
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._fetches = 0       # completed fetch attempts
+        self._epoch = 0         # bumped by invalidate()
+        self._fetch_epoch = 0   # epoch the last fetch started in
+        self._fetch_error = None
+        self._revalidator = None
+        self._listeners = []  # called with (frames, tokens) after each new load
+        self._refresher = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def _due(self):
+        if not self._frames or self._checked_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at <= self.ttl:
+            return False
+        # With the background refresher running, readers only fetch once the
+        # snapshot is older than the staleness limit
+        if self.refresher_running():
+            return now - self._loaded_at > self.max_staleness
+        return True
+
+    def refresh(self, only_if_due=False):
+        # Single-flight: callers that queue behind a fetch share its outcome
+        # instead of repeating the same request. The fetch runs outside
+        # self._lock so readers keep serving the current snapshot.
+        ticket = self._fetches
+        with self._refresh_lock:
+            if self._fetches != ticket and self._fetch_epoch == self._epoch:
+                metrics.inc("workbook_cache_requests_total", cache="workbook", result="coalesced")
+                if self._fetch_error is not None and not self._frames:
+                    raise self._fetch_error
+                return self._fetch_error is None
+            if only_if_due and not self._due():
+                return True
+            self._fetch_epoch = self._epoch
+            try:
+                return self._fetch()
+            finally:
+                self._fetches += 1
+
+    def _fetch(self):
+        self._checked_at = time.monotonic()
+        self._fetch_error = None
+        try:
+            # Skip the full download when the backend reports no change since the
+            # last load; a cold cache downloads anyway, so it saves the request
+            revision = self.backend.revision() if self._frames else None
+            if self._frames and revision is not None and revision == self._revision:
+                self._loaded_at = time.monotonic()
+                return True
+            frames = self.backend.load(self.tabs)
+            tokens = {tab: frame_token(df) for tab, df in frames.items()}
+            nbytes = sum(int(df.memory_usage(deep=True).sum()) for df in frames.values())
+        except Exception as exc:
+            self._fetch_error = exc
+            if not self._frames:
+                raise
+            logger.exception("Workbook refresh failed; serving the last good snapshot")
+            return False
+        with self._lock:
+            self._frames = frames
+            self._tokens = tokens
+            self._nbytes = nbytes
+            self._revision = revision
+            self._loaded_at = time.monotonic()
+        for listener in list(self._listeners):
+            try:
+                listener(frames, tokens)
+            except Exception:
+                logger.exception("Workbook update listener failed")
+        return True
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _snapshot(self):
+        if not self._due():
+            metrics.inc("workbook_cache_requests_total", cache="workbook", result="hit")
+        elif self._servable_stale():
+            # Stale-while-revalidate: answer now, fetch in the background
+            metrics.inc("workbook_cache_requests_total", cache="workbook", result="stale")
+            self._revalidate()
+        else:
+            metrics.inc("workbook_cache_requests_total", cache="workbook", result="miss")
+            self.refresh(only_if_due=True)
+        with self._lock:
+            return self._frames, self._tokens
+
+    def _servable_stale(self):
+        # Expired by TTL (not invalidated by a write) and within the staleness limit
+        checked_at, loaded_at = self._checked_at, self._loaded_at
+        return (bool(self._frames) and checked_at is not None and loaded_at is not None
+                and time.monotonic() - loaded_at <= self.max_staleness)
+
+    def _revalidate(self):
+        with self._lock:
+            if self._refresh_lock.locked() or (self._revalidator is not None and self._revalidator.is_alive()):
+                return
+            self._revalidator = threading.Thread(target=self._run_revalidate, name="workbook-revalidate", daemon=True)
+            self._revalidator.start()
+
+    def _run_revalidate(self):
+        try:
+            self.refresh(only_if_due=True)
+        except Exception:
+            logger.exception("Background workbook revalidation failed")
+
+    def get(self, tab):
+        frames, _ = self._snapshot()
+        # Callers add derived columns, so never hand out the cached frame itself
+        return frames[tab].copy()
+
+    def get_frames(self, *tabs):
+        frames, _ = self._snapshot()
+        return tuple(frames[tab].copy() for tab in tabs)
+
+    def version(self, *tabs):
+        _, tokens = self._snapshot()
+        return "-".join(tokens[tab] for tab in (tabs or self.tabs))
+
+    def derived(self, key, tabs, build):
+        # Memoize a value computed from cached tabs until one of those tabs changes.
+        # build() receives the cached frames themselves and must not modify them.
+        frames, tokens = self._snapshot()
+        key_tokens = tuple(tokens[tab] for tab in tabs)
+        with self._lock:
+            entry = self._derived.get(key)
+        if entry is None or entry[0] != key_tokens:
+            metrics.inc("workbook_cache_requests_total", cache="derived", result="miss")
+            entry = (key_tokens, build(*(frames[tab] for tab in tabs)))
+            with self._lock:
+                self._derived[key] = entry
+        else:
+            metrics.inc("workbook_cache_requests_total", cache="derived", result="hit")
+        return entry[1]
+
+    def nbytes(self):
+        # Memory held by the cached frames (derived values not included)
+        return self._nbytes
+
+    def age(self):
+        # Seconds since the snapshot was last confirmed against the backend
+        loaded_at = self._loaded_at
+        return None if loaded_at is None else time.monotonic() - loaded_at
+
+    def append_rows(self, tab, rows):
+        try:
+            self.backend.append_rows(tab, rows)
+        finally:
+            # A failed write may still have landed, so reload either way
+            self.invalidate(tab)
+
+    def invalidate(self, *tabs):
+        # Tabs are fetched together, so any invalidation forces a full reload
+        with self._lock:
+            self._checked_at = None
+            self._revision = None
+            self._epoch += 1
+        # Let a running refresher pick the change up now rather than on its next tick
+        self._wake.set()
+
+    # --- Background refresher ---
+    def refresher_running(self):
+        return self._refresher is not None and self._refresher.is_alive()
+
+    def _run_refresher(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Initial workbook load failed; retrying")
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def start_refresher(self, interval=None):
+        with self._lock:
+            if self.refresher_running():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._run_refresher, args=(interval or self.refresh_interval,), name="workbook-refresher", daemon=True
+            )
+            self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+        self._wake.set()
+
+
+class CacheRegistry:
+    # One WorkbookCache per project, created on first use. Once the cached
+    # frames exceed max_bytes (None: no limit) the least recently used
+    # loaded projects are dropped; the project that just loaded is kept.
+    def __init__(self, factory=make_cache, max_bytes=CACHE_MAX_BYTES):
+        self.factory = factory
+        self.max_bytes = max_bytes
+        self._caches = OrderedDict()
+        self._listeners = []  # called with (project, frames, tokens) after each new load
+        self._refreshing = False
+        self._lock = threading.RLock()
+
+    def get(self, project=None):
+        project = project or DEFAULT_PROJECT
+        with self._lock:
+            cache = self._caches.get(project)
+            if cache is None:
+                if project not in PROJECTS:
+                    raise KeyError(f"Unknown project: {project!r}")
+                cache = self._add(project, self.factory(project))
+            self._caches.move_to_end(project)
+            return cache
+
+    def put(self, project, cache):
+        with self._lock:
+            old = self._caches.pop(project, None)
+            if old is not None:
+                old.stop_refresher()
+            self._add(project, cache)
+
+    def _add(self, project, cache):
+        cache.add_listener(lambda frames, tokens: self._loaded(project, frames, tokens))
+        self._caches[project] = cache
+        if self._refreshing:
+            cache.start_refresher()
+        return cache
+
+    def _loaded(self, project, frames, tokens):
+        for listener in list(self._listeners):
+            try:
+                listener(project, frames, tokens)
+            except Exception:
+                logger.exception("Workbook update listener failed for project %s", project)
+        self._evict(keep=project)
+
+    def _evict(self, keep):
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            total = self.nbytes()
+            for project in list(self._caches):
+                if total <= self.max_bytes:
+                    break
+                # Caches still on their first load hold nothing to free
+                if project == keep or not self._caches[project].nbytes():
+                    continue
+                cache = self._caches.pop(project)
+                cache.stop_refresher()
+                total -= cache.nbytes()
+                metrics.inc("workbook_cache_evictions_total")
+                logger.info("Dropped cached workbook for project %s (%d bytes)", project, cache.nbytes())
+
+    def nbytes(self):
+        with self._lock:
+            return sum(cache.nbytes() for cache in self._caches.values())
+
+    def cached_projects(self):
+        with self._lock:
+            return list(self._caches)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def start_refreshers(self):
+        with self._lock:
+            self._refreshing = True
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.start_refresher()
+
+    def close(self):
+        with self._lock:
+            caches = list(self._caches.values())
+            self._caches.clear()
+        for cache in caches:
+            cache.stop_refresher()
+
+
+class LoadPending(Exception):
+    # map_projects result for a project whose load outlasted the timeout
+    pass
+
+
+registry = CacheRegistry()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def cache_for(project=None):
+    return registry.get(project)
+
+
+def use_cache(cache, project=None):
+    # Replace a project's cache, e.g. with one reading a shared snapshot
+    registry.put(project or DEFAULT_PROJECT, cache)
+
+
+def use_factory(factory, max_bytes=CACHE_MAX_BYTES):
+    # Build every project's cache with factory from now on, dropping current ones.
+    # Listeners are not carried over: they belong to the process that added
+    # them, and a forked worker must not keep its parent's snapshot publisher
+    # or history recorder. Add listeners after switching.
+    global registry
+    old, registry = registry, CacheRegistry(factory, max_bytes)
+    registry._refreshing = old._refreshing
+    old.close()
+
+
+def _bulk_call(func, project):
+    with quota_wait(BULK_QUOTA_WAIT):
+        return func(project)
+
+
+def map_projects(func, projects=None, timeout=None):
+    # Runs func(project) for several projects at once on a shared thread pool,
+    # so the wait is about that of the slowest one. Returns {project: result},
+    # with the exception in place of the result where func raised. Projects
+    # still running after timeout seconds get LoadPending and finish in the
+    # background.
+    global _executor
+    projects = list(projects or PROJECTS)
+    with _executor_lock:
+        # Created on first use so forked serving workers do not inherit its threads
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LOAD_WORKERS or max(8, len(PROJECTS)),
+                                           thread_name_prefix="workbook-load")
+    futures = {project: _executor.submit(_bulk_call, func, project) for project in projects}
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    for project, future in futures.items():
+        if not future.done():
+            results[project] = LoadPending(project)
+            continue
+        try:
+            results[project] = future.result()
+        except Exception as exc:
+            logger.warning("Loading project %s failed: %s", project, exc)
+            results[project] = exc
+    return results
+
+
+def shutdown_loader():
+    # Stop the load threads, e.g. before forking
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def load_projects(projects=None):
+    # Fetch several projects' workbooks concurrently
+    return map_projects(lambda project: cache_for(project).refresh(), projects)
+
+
+def publish_snapshots():
+    # Write every new load to a per-project file that serving workers follow
+    registry.add_listener(lambda project, frames, tokens: write_shared_snapshot(snapshot_path(project), frames))
+
+
+def add_listener(listener):
+    # listener(project, frames, tokens) runs after every new load of any project
+    registry.add_listener(listener)
+
+
+def get_frame(tab, project=None):
+    return cache_for(project).get(tab)
+
+
+def get_frames(*tabs, project=None):
+    return cache_for(project).get_frames(*tabs)
+
+
+def version(*tabs, project=None):
+    return cache_for(project).version(*tabs)
+
+
+def derived(key, tabs, build, project=None):
+    return cache_for(project).derived(key, tabs, build)
+
+
+def append_rows(tab, rows, project=None):
+    cache_for(project).append_rows(tab, rows)
+
+
+def invalidate(*tabs, project=None):
+    cache_for(project).invalidate(*tabs)
+
+
+def snapshot_age(project=None):
+    return cache_for(project).age()
+
+
+def start_refresher():
+    # Keep every cached project warm, including ones cached later
+    registry.start_refreshers()